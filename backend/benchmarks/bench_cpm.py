@@ -0,0 +1,49 @@
+"""Time the CPM engine on a synthetic project.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_cpm --tasks 100000 --edges 500000
+
+Edges point forward within a sliding window (--window) so the graph looks
+like a long project rather than a shallow random DAG. Each window given is
+timed separately; the default pairs a wide graph with a deep, chain-like
+one (about 60k levels), which takes the engine's scalar path.
+"""
+import argparse
+import time
+import numpy as np
+from scheduling.cpm import build_csr, compute_schedule
+
+
+def synthetic_project(tasks, edges, window, seed):
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(0, tasks - 1, edges)
+    targets = np.minimum(tasks - 1, sources + rng.integers(1, window + 1, edges))
+    durations = rng.integers(0, 20, tasks)
+    return durations, sources, targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=500_000)
+    parser.add_argument("--window", type=int, nargs="+", default=[200, 3])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for window in args.window:
+        durations, sources, targets = synthetic_project(args.tasks, args.edges, window, args.seed)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            indptr, indices = build_csr(args.tasks, sources, targets)
+            schedule = compute_schedule(durations, indptr, indices)
+            timings.append(time.perf_counter() - started)
+
+        print(f"tasks={args.tasks} edges={args.edges} window={window} levels={int(schedule.level.max()) + 1}")
+        print(f"duration={schedule.project_duration} critical={int(schedule.critical.sum())}")
+        print(f"best {min(timings) * 1000:.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Drive the /mattermost/* routes against the local Focalboard stub.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_mattermost --boards 20 --cards 200 --latency 0.02
+
+For every route it prints the outbound calls per request and p50/p99
+latency, so regressions in fan-out show up as soon as they are made.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_routes(board_ids, team_id):
+    board_id = board_ids[0]
+    params = {"board_id": board_id, "team_id": team_id}
+    return [
+        ("GET", "/mattermost/boards_with_access/", {"team_id": team_id}),
+        ("GET", "/mattermost/board/columns_with_tasks/", params),
+        ("POST", "/mattermost/gantt/early/", params),
+        ("POST", "/mattermost/gantt/late/", params),
+        ("POST", "/mattermost/gantt/leveled/", params),
+        ("GET", "/mattermost/cpm_graph/", params),
+        ("GET", "/mattermost/board/schedule/", params),
+        ("GET", "/mattermost/board/schedule/export/", params),
+        ("GET", "/mattermost/board/members/", params),
+    ]
+
+
+def run(args):
+    stub_port = free_port()
+    app_port = free_port()
+    db_dir = tempfile.mkdtemp(prefix="mattgantt-bench-")
+
+    # Settings are read once at import, so point them at the stub first.
+    os.environ["MATTERMOST_URL"] = f"http://127.0.0.1:{stub_port}"
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+
+    import requests
+    from core.config import get_settings
+    from benchmarks.focalboard_stub import FocalboardStore, StubConfig, create_stub_app
+
+    settings = get_settings()
+    store = FocalboardStore(settings.mattermost_template_board_id)
+    board_ids = store.seed(boards=args.boards, cards=args.cards, users=args.users, seed=args.seed)
+    stub = create_stub_app(store, StubConfig(args.latency, args.jitter, args.error_rate))
+
+    from main import app
+
+    servers = [serve(stub, stub_port), serve(app, app_port)]
+    session = requests.Session()
+    session.cookies.set("mattermost_token", "stub-token")
+    base_url = f"http://127.0.0.1:{app_port}"
+
+    results = []
+    for method, path, params in build_routes(board_ids, store.team_id):
+        latencies = []
+        calls = []
+        failures = 0
+        for _ in range(args.iterations):
+            before = sum(stub.state.counts.values())
+            started = time.perf_counter()
+            response = session.request(method, base_url + path, params=params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            calls.append(sum(stub.state.counts.values()) - before)
+            if not response.ok:
+                failures += 1
+        results.append({
+            "route": f"{method} {path}",
+            "calls": statistics.mean(calls),
+            "p50_ms": percentile(latencies, 0.50),
+            "p99_ms": percentile(latencies, 0.99),
+            "failures": failures
+        })
+
+    for server in servers:
+        server.should_exit = True
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return results
+
+    print(f"boards={args.boards} cards={args.cards} latency={args.latency}s error_rate={args.error_rate} iterations={args.iterations}")
+    print(f"{'route':45} {'calls':>7} {'p50 ms':>9} {'p99 ms':>9} {'fail':>5}")
+    for row in results:
+        print(f"{row['route']:45} {row['calls']:7.1f} {row['p50_ms']:9.1f} {row['p99_ms']:9.1f} {row['failures']:5d}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boards", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every stub response")
+    parser.add_argument("--jitter", type=float, default=0.005, help="extra random delay, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub responses that fail with 500")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
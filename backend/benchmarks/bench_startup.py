@@ -0,0 +1,87 @@
+"""Measure worker cold start and fail when it regresses.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_startup --runs 5 --max-import 2.0 --max-ready 3.0 --max-rss 120
+
+Every run is a fresh interpreter that imports the app, runs its startup
+hooks against an empty SQLite database and answers one /auth/login. The
+run reports import time, time until that first response and peak RSS, and
+checks that none of the analytics libraries (pandas, plotly, networkx) were
+loaded on the way. Exits with status 1 when the medians exceed a budget or
+a heavy module shows up, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+HEAVY_MODULES = ("pandas", "plotly", "networkx")
+
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.post("/auth/login", data={"username": "bench", "password": "bench"})
+    ready = time.perf_counter()
+    loaded = [name for name in %r if name in sys.modules]
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import": imported - started,
+    "ready": ready - started,
+    "rss_mb": rss / 1024 if sys.platform != "darwin" else rss / 1024 / 1024,
+    "heavy": loaded
+}))
+""" % (HEAVY_MODULES,)
+
+
+def cold_start():
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DB_URL=f"sqlite:///{directory}/bench.db")
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import", type=float, default=2.0, help="seconds")
+    parser.add_argument("--max-ready", type=float, default=3.0, help="seconds")
+    parser.add_argument("--max-rss", type=float, default=120.0, help="MB")
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.runs)]
+    imported = statistics.median(run["import"] for run in runs)
+    ready = statistics.median(run["ready"] for run in runs)
+    rss = statistics.median(run["rss_mb"] for run in runs)
+    heavy = sorted({name for run in runs for name in run["heavy"]})
+
+    print(f"import {imported * 1000:.0f} ms (budget {args.max_import * 1000:.0f})")
+    print(f"first response {ready * 1000:.0f} ms (budget {args.max_ready * 1000:.0f})")
+    print(f"peak rss {rss:.0f} MB (budget {args.max_rss:.0f})")
+
+    failures = []
+    if imported > args.max_import:
+        failures.append("import time over budget")
+    if ready > args.max_ready:
+        failures.append("first response over budget")
+    if rss > args.max_rss:
+        failures.append("peak RSS over budget")
+    if heavy:
+        failures.append(f"loaded at startup: {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
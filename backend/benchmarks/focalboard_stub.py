@@ -0,0 +1,366 @@
+"""In-process stand-in for the Mattermost / Focalboard endpoints used by mattermost/api_calls.py.
+
+Every request can be delayed (latency + jitter) and failed at a given
+error rate, and is counted per route so benchmarks can see the outbound
+fan-out of each /mattermost/* endpoint.
+"""
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+import asyncio
+import copy
+import json
+import random
+import string
+import threading
+import time
+
+
+STATUS_PROPERTY_ID = "a972dc7a-5f4c-45d2-8044-8c28c69717f1"
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def generate_id():
+    return "".join(random.choices(string.ascii_lowercase + string.digits, k=27))
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+
+class FocalboardStore:
+    def __init__(self, template_board_id, team_id="team1"):
+        self.template_board_id = template_board_id
+        self.team_id = team_id
+        self.boards = {}
+        self.blocks = {}
+        self.members = {}
+        self.users = {}
+        self.lock = threading.Lock()
+        self.add_user("me", "benchmark")
+        self.add_template()
+
+    def add_user(self, user_id, username):
+        self.users[user_id] = {"id": user_id, "username": username}
+
+    def add_template(self):
+        board_id = self.template_board_id
+        self.boards[board_id] = {
+            "id": board_id,
+            "teamId": self.team_id,
+            "title": "Progress Tracker",
+            "description": "",
+            "isTemplate": True,
+            "cardProperties": [
+                {
+                    "id": STATUS_PROPERTY_ID,
+                    "name": "Status",
+                    "type": "select",
+                    "options": [
+                        {"id": generate_id(), "value": "Not Started", "color": "propColorDefault"},
+                        {"id": generate_id(), "value": "In Progress", "color": "propColorDefault"},
+                        {"id": generate_id(), "value": "Completed", "color": "propColorDefault"}
+                    ]
+                },
+                {"id": generate_id(), "name": "Assignee", "type": "person", "options": []}
+            ]
+        }
+        self.blocks[board_id] = {}
+        self.add_view(board_id)
+
+    def add_view(self, board_id):
+        view_id = generate_id()
+        self.blocks[board_id][view_id] = {
+            "id": view_id,
+            "boardId": board_id,
+            # Duplicated boards keep pointing at the template, which is what
+            # services.is_valid_board looks for.
+            "parentId": self.template_board_id,
+            "type": "view",
+            "title": "Progress Tracker",
+            "fields": {"cardOrder": []}
+        }
+        return view_id
+
+    def duplicate_template(self, team_id):
+        template = self.boards[self.template_board_id]
+        board_id = generate_id()
+        board = copy.deepcopy(template)
+        board.update({"id": board_id, "teamId": team_id, "isTemplate": False})
+        self.boards[board_id] = board
+        self.blocks[board_id] = {}
+        self.add_view(board_id)
+        self.members[board_id] = {"me"}
+        return board
+
+    def property_id(self, board_id, name):
+        for prop in self.boards[board_id]["cardProperties"]:
+            if prop["name"] == name:
+                return prop["id"]
+        return None
+
+    def add_card(self, board_id, title, properties):
+        card_id = generate_id()
+        self.blocks[board_id][card_id] = {
+            "id": card_id,
+            "boardId": board_id,
+            "parentId": board_id,
+            "type": "card",
+            "title": title,
+            "fields": {"properties": properties, "contentOrder": []},
+            "createAt": now_ms(),
+            "updateAt": now_ms(),
+            "deleteAt": 0
+        }
+        return card_id
+
+    def seed(self, boards=5, cards=50, users=20, dependency_rate=0.3, seed=0):
+        """Create `boards` Progress Tracker boards with `cards` dated cards each."""
+        rng = random.Random(seed)
+        user_ids = []
+        for i in range(users):
+            user_id = f"user{i}"
+            self.add_user(user_id, f"member{i}")
+            user_ids.append(user_id)
+
+        for b in range(boards):
+            board = self.duplicate_template(self.team_id)
+            board_id = board["id"]
+            board["title"] = f"Board {b}"
+            for name, kind in (("Start Date", "date"), ("End Date", "date"), ("Description", "text"), ("Depends on", "multiSelect")):
+                board["cardProperties"].append({"id": generate_id(), "name": name, "type": kind, "options": []})
+
+            ids = {name: self.property_id(board_id, name) for name in ("Status", "Start Date", "End Date", "Description", "Depends on", "Assignee")}
+            columns = [option["id"] for option in board["cardProperties"][0]["options"]]
+            start = 19700 * DAY_MS
+            card_ids = []
+            for c in range(cards):
+                begin = start + rng.randint(0, 60) * DAY_MS
+                end = begin + rng.randint(1, 10) * DAY_MS
+                depends_on = [rng.choice(card_ids) for _ in range(2) if card_ids and rng.random() < dependency_rate]
+                depends_on = list(dict.fromkeys(depends_on))
+                properties = {
+                    ids["Status"]: rng.choice(columns),
+                    ids["Description"]: f"Card {c}",
+                    ids["Start Date"]: json.dumps({"from": begin}),
+                    ids["End Date"]: json.dumps({"from": end}),
+                    ids["Depends on"]: depends_on,
+                    ids["Assignee"]: rng.choice(user_ids) if user_ids and rng.random() < 0.7 else ""
+                }
+                card_ids.append(self.add_card(board_id, f"Card {c}", properties))
+
+            board["cardProperties"][-1]["options"] = [
+                {"id": card_id, "value": self.blocks[board_id][card_id]["title"], "color": "propColorDefault"}
+                for card_id in card_ids
+            ]
+            view = next(block for block in self.blocks[board_id].values() if block["type"] == "view")
+            view["fields"]["cardOrder"] = list(card_ids)
+            self.members[board_id].update(rng.sample(user_ids, min(len(user_ids), 5)))
+        return [board_id for board_id in self.boards if board_id != self.template_board_id]
+
+
+def card_json(block):
+    return {
+        "id": block["id"],
+        "boardId": block["boardId"],
+        "parentId": block["parentId"],
+        "title": block["title"],
+        "properties": block["fields"].get("properties", {}),
+        "contentOrder": block["fields"].get("contentOrder", []),
+        "createAt": block.get("createAt", 0),
+        "updateAt": block.get("updateAt", 0),
+        "deleteAt": 0
+    }
+
+
+def patch_block(block, patch):
+    for key, value in patch.get("updatedFields", {}).items():
+        block["fields"][key] = value
+    for key in patch.get("deletedFields", []):
+        block["fields"].pop(key, None)
+    if "title" in patch:
+        block["title"] = patch["title"]
+    block["updateAt"] = now_ms()
+
+
+def create_stub_app(store, config=None):
+    config = config or StubConfig()
+    app = FastAPI(title="Focalboard stub")
+    app.state.store = store
+    app.state.config = config
+    app.state.counts = {}
+    app.state.counts_lock = threading.Lock()
+    fb = "/plugins/focalboard/api/v2"
+
+    def not_found():
+        return JSONResponse(status_code=404, content={"error": "not found"})
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        response_delay = config.latency + random.uniform(0, config.jitter) if config.latency or config.jitter else 0
+        if response_delay:
+            await asyncio.sleep(response_delay)
+        if config.error_rate and random.random() < config.error_rate:
+            response = JSONResponse(status_code=500, content={"error": "injected failure"})
+        else:
+            response = await call_next(request)
+        route = request.scope.get("route")
+        key = f"{request.method} {route.path if route else request.url.path}"
+        with app.state.counts_lock:
+            app.state.counts[key] = app.state.counts.get(key, 0) + 1
+        return response
+
+    @app.post("/api/v4/users/login")
+    def login():
+        return Response(content="{}", media_type="application/json", headers={"Token": "stub-token"})
+
+    @app.get("/api/v4/users/me")
+    def me():
+        return store.users["me"]
+
+    @app.get("/api/v4/users/{user_id}/sessions")
+    def sessions(user_id: str):
+        return [{"id": "session1", "props": {"browser": "Unknown/0.0", "os": ""}}]
+
+    @app.post("/api/v4/users/{user_id}/sessions/revoke")
+    def revoke(user_id: str):
+        return {"status": "OK"}
+
+    @app.get(fb + "/teams")
+    def teams():
+        return [{"id": store.team_id, "title": "Benchmark team"}]
+
+    @app.get(fb + "/teams/{team_id}/boards")
+    def boards(team_id: str):
+        return [
+            {key: value for key, value in board.items() if key != "cardProperties"}
+            for board in store.boards.values()
+            if board["teamId"] == team_id and not board.get("isTemplate")
+        ]
+
+    @app.get(fb + "/teams/{team_id}/templates")
+    def templates(team_id: str):
+        return [{"id": store.template_board_id, "title": "Progress Tracker"}]
+
+    @app.get(fb + "/teams/{team_id}/users")
+    def search_users(team_id: str, search: str = ""):
+        return [user for user in store.users.values() if search.lower() in user["username"].lower()]
+
+    @app.post(fb + "/teams/{team_id}/users")
+    async def users_by_id(team_id: str, request: Request):
+        user_ids = await request.json()
+        return [store.users[user_id] for user_id in user_ids if user_id in store.users]
+
+    @app.get(fb + "/boards/{board_id}")
+    def get_board(board_id: str):
+        board = store.boards.get(board_id)
+        return board if board else not_found()
+
+    @app.patch(fb + "/boards/{board_id}")
+    async def patch_board(board_id: str, request: Request):
+        board = store.boards.get(board_id)
+        if not board:
+            return not_found()
+        data = await request.json()
+        with store.lock:
+            for key in ("title", "description"):
+                if key in data:
+                    board[key] = data[key]
+            for prop in data.get("updatedCardProperties", []):
+                for i, existing in enumerate(board["cardProperties"]):
+                    if existing["id"] == prop["id"]:
+                        board["cardProperties"][i] = prop
+                        break
+                else:
+                    board["cardProperties"].append(prop)
+            deleted = set(data.get("deletedCardProperties", []))
+            board["cardProperties"] = [prop for prop in board["cardProperties"] if prop["id"] not in deleted]
+        return board
+
+    @app.delete(fb + "/boards/{board_id}")
+    def delete_board(board_id: str):
+        store.boards.pop(board_id, None)
+        store.blocks.pop(board_id, None)
+        return {}
+
+    @app.post(fb + "/boards/{board_id}/duplicate")
+    def duplicate(board_id: str, toTeam: str = "", asTemplate: bool = False):
+        with store.lock:
+            board = store.duplicate_template(toTeam or store.team_id)
+        return {"boards": [board], "blocks": list(store.blocks[board["id"]].values())}
+
+    @app.get(fb + "/boards/{board_id}/cards")
+    def cards(board_id: str):
+        if board_id not in store.blocks:
+            return not_found()
+        return [card_json(block) for block in store.blocks[board_id].values() if block["type"] == "card"]
+
+    @app.get(fb + "/boards/{board_id}/blocks")
+    def blocks(board_id: str):
+        if board_id not in store.blocks:
+            return not_found()
+        return list(store.blocks[board_id].values())
+
+    @app.post(fb + "/boards/{board_id}/blocks")
+    async def create_blocks(board_id: str, request: Request):
+        if board_id not in store.blocks:
+            return not_found()
+        blocks = await request.json()
+        created = []
+        with store.lock:
+            for block in blocks:
+                block = dict(block)
+                # Focalboard regenerates block ids on insert.
+                block["id"] = generate_id()
+                store.blocks[board_id][block["id"]] = block
+                created.append(block)
+        return created
+
+    @app.patch(fb + "/boards/{board_id}/blocks/")
+    async def patch_blocks(board_id: str, request: Request):
+        data = await request.json()
+        board_blocks = store.blocks.get(board_id, {})
+        if any(block_id not in board_blocks for block_id in data["block_ids"]):
+            return not_found()
+        with store.lock:
+            for block_id, patch in zip(data["block_ids"], data["block_patches"]):
+                patch_block(board_blocks[block_id], patch)
+        return {}
+
+    @app.patch(fb + "/boards/{board_id}/blocks/{block_id}")
+    async def patch_one_block(board_id: str, block_id: str, request: Request):
+        block = store.blocks.get(board_id, {}).get(block_id)
+        if not block:
+            return not_found()
+        patch = await request.json()
+        with store.lock:
+            patch_block(block, patch)
+        return {}
+
+    @app.delete(fb + "/boards/{board_id}/blocks/{block_id}")
+    def delete_block(board_id: str, block_id: str):
+        store.blocks.get(board_id, {}).pop(block_id, None)
+        return {}
+
+    @app.get(fb + "/boards/{board_id}/members")
+    def members(board_id: str):
+        return [{"boardId": board_id, "userId": user_id} for user_id in store.members.get(board_id, ())]
+
+    @app.post(fb + "/boards/{board_id}/members")
+    async def add_member(board_id: str, request: Request):
+        data = await request.json()
+        store.members.setdefault(board_id, set()).add(data["userId"])
+        return data
+
+    @app.delete(fb + "/boards/{board_id}/members/{member_id}")
+    def remove_member(board_id: str, member_id: str):
+        store.members.get(board_id, set()).discard(member_id)
+        return {}
+
+    return app
@@ -11,6 +11,38 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
     refresh_token_expire_days: int = 1
+    mattermost_url: str = "https://mattermost.portabo.cz"
+    mattermost_template_board_id: str = "bbzj7aho8dtrx8emw8p4arkj1bw"
+    mattermost_pool_connections: int = 10
+    mattermost_pool_maxsize: int = 32
+    mattermost_pool_block: bool = False
+    mattermost_connect_timeout: float = 3.05
+    mattermost_read_timeout: float = 30.0
+    mattermost_max_retries: int = 3
+    mattermost_backoff_base: float = 0.25
+    mattermost_backoff_max: float = 5.0
+    mattermost_breaker_threshold: int = 5
+    mattermost_breaker_reset: float = 30.0
+    mattermost_fanout_limit: int = 16
+    mattermost_batch_size: int = 100
+    mattermost_user_cache_ttl: int = 300
+    mattermost_user_cache_size: int = 10000
+    mattermost_schema_cache_ttl: int = 300
+    mattermost_schema_cache_size: int = 1000
+    schedule_cache_ttl: int = 600
+    schedule_cache_size: int = 200
+    simulation_samples: int = 10000
+    simulation_max_samples: int = 100000
+    simulation_chunk_size: int = 1024
+    process_pool_workers: int = 4
+    simulation_workers: int = 0
+    portfolio_workers: int = 4
+    portfolio_batch_size: int = 32
+    scenario_max_batch: int = 100
+    render_cache_ttl: int = 600
+    render_cache_size: int = 500
+    gantt_index_cache_size: int = 100
+    export_batch_size: int = 1000
 
     class Config:
         env_file = ".env"
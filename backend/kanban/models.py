@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Table, Column, Integer, String, DateTime, Boolean, Float, JSON, ForeignKey
 from sqlalchemy.orm import relationship
 from core.database import Base
 
@@ -50,3 +50,38 @@ class Task(Base):
         secondaryjoin=id == task_parents.c.parent_id,
         backref="child_tasks"
     )
+    estimate = relationship("TaskEstimate", uselist=False, cascade="all, delete-orphan")
+
+
+class TaskEstimate(Base):
+    __tablename__ = "task_estimates"
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    optimistic = Column(Float, nullable=True)
+    likely = Column(Float, nullable=True)
+    pessimistic = Column(Float, nullable=True)
+
+
+class TaskSchedule(Base):
+    __tablename__ = "task_schedules"
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), index=True, nullable=False)
+    early_start = Column(DateTime, nullable=False)
+    early_finish = Column(DateTime, nullable=False)
+    late_start = Column(DateTime, nullable=False)
+    late_finish = Column(DateTime, nullable=False)
+    total_float = Column(Integer, nullable=False)
+    free_float = Column(Integer, nullable=False)
+    critical = Column(Boolean, nullable=False)
+    depends_on = Column(JSON, nullable=False)
+
+
+class BoardSchedule(Base):
+    __tablename__ = "board_schedules"
+
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    project_start = Column(DateTime, nullable=True)
+    project_duration = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
@@ -1,24 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File
-from fastapi.responses import JSONResponse
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File
+from typing import List, Optional
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
+from core.config import get_settings
 from core.database import get_db
 from . import models
 from . import schemas
-from . import cpm
 import auth.models
 from auth import utils
-import pandas as pd
 from io import StringIO
 import re
-import plotly.express as px
-import networkx as nx
-from networkx.readwrite import json_graph
-from .services import get_task_data, generate_gantt
-from .cpm import calculate_critical_path
+import json
+from .services import (
+    get_board_schedule, generate_gantt, check_dependencies, schedule_task, unschedule_task, invalidate_schedule,
+    build_cpm_graph, build_schedule_bundle, parse_schedule_fields, SCHEDULE_FIELDS,
+    apply_estimate, simulate_board, ESTIMATE_FIELDS, get_portfolio,
+    evaluate_board_scenarios, render_view,
+    generate_planned_gantt, get_gantt_index, viewport_key, export_schedule
+)
+from scheduling.export import ExportFormat
+from scheduling.gantt import GanttFormat, gantt_viewport
 
 
+settings = get_settings()
+
 router = APIRouter()
 
 
@@ -86,6 +91,7 @@ def delete_board(
         raise HTTPException(status_code=404, detail="Board not found")
     db.delete(board)
     db.commit()
+    invalidate_schedule(db, board_id)
     return {"message": "Board deleted"}
 
 
@@ -157,6 +163,7 @@ def delete_column(
         raise HTTPException(status_code=404, detail="Column not found")
     db.delete(column)
     db.commit()
+    invalidate_schedule(db, column.board_id)
     return {"message": "Column deleted"}
 
 
@@ -194,10 +201,12 @@ def create_task(
         end_date=task.end_date,
         parent_tasks=parent_tasks
     )
+    apply_estimate(new_task, task.dict(include=set(ESTIMATE_FIELDS), exclude_none=True))
 
     db.add(new_task)
     db.commit()
     db.refresh(new_task)
+    schedule_task(db, board_id, new_task)
     return schemas.TaskOut.from_orm(new_task)
 
 
@@ -254,18 +263,43 @@ def update_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    board_id = task.column.board_id
     update_data = updated_task.dict(exclude_unset=True)
 
+    target_board_id = board_id
+    if update_data.get("column_id") is not None:
+        column = db.query(models.BoardColumn).join(models.Board).filter(models.BoardColumn.id == update_data["column_id"], models.Board.owner_id == user.id).first()
+        if not column:
+            raise HTTPException(status_code=404, detail="Column not found")
+        target_board_id = column.board_id
+
     if "parent_ids" in update_data:
-        parent_ids = update_data.pop("parent_ids")
-        parent_tasks = db.query(models.Task).filter(models.Task.id.in_(parent_ids)).all()
+        parent_ids = update_data.pop("parent_ids") or []
+        parent_tasks = db.query(models.Task).join(models.BoardColumn).filter(
+            models.Task.id.in_(parent_ids),
+            models.BoardColumn.board_id == target_board_id
+        ).all()
+
+        if len(parent_tasks) != len(set(parent_ids)):
+            raise HTTPException(
+                status_code=400,
+                detail="Some parent tasks do not exist or are not on the same board"
+            )
+        check_dependencies(db, target_board_id, task.id, parent_ids)
         task.parent_tasks = parent_tasks
         
+    estimate_data = {field: update_data.pop(field) for field in ESTIMATE_FIELDS if field in update_data}
+    if estimate_data:
+        apply_estimate(task, estimate_data)
+
     for key, value in update_data.items():
         setattr(task, key, value)
     
     db.commit()
     db.refresh(task)
+    if task.column.board_id != board_id:
+        unschedule_task(db, board_id, task.id)
+    schedule_task(db, task.column.board_id, task)
     return schemas.TaskOut.from_orm(task)
 
 
@@ -278,110 +312,140 @@ def delete_task(
     task = db.query(models.Task).join(models.BoardColumn).join(models.Board).filter(models.Board.owner_id == user.id, models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    board_id = task.column.board_id
     db.delete(task)
     db.commit()
+    unschedule_task(db, board_id, task_id)
     return {"message": "Task deleted"}
 
 
 @router.get("/gantt/early/{board_id}")
 def get_gantt_early_chart(
         board_id: int,
+        format: GanttFormat = "columnar",
+        viewport: Optional[dict] = Depends(gantt_viewport),
+        if_none_match: Optional[str] = Header(None),
         db: Session = Depends(get_db),
         user: auth.models.User = Depends(utils.get_current_user)
     ):
-    task_input = get_task_data(db, user, board_id)
-    tasks_dict, _, _ = calculate_critical_path(task_input)
-    fig = generate_gantt(tasks_dict, "early_start_date", "early_finish_date")
-    return Response(content=fig.to_json(), media_type="application/json")
+    def render():
+        if format == "plotly":
+            tasks_dict, _, _ = get_board_schedule(db, user, board_id)
+            return generate_gantt(tasks_dict, "early_start_date", "early_finish_date").to_json()
+        index = get_gantt_index(db, user, board_id, "early")
+        return json.dumps(index.query(**viewport) if viewport else index.payload)
+
+    view = f"early.{format}" + (f".{viewport_key(viewport)}" if viewport else "")
+    # Viewport slices come cheaply from the cached index; keeping them would evict full charts.
+    return render_view(db, user, board_id, view, if_none_match, render, cache=viewport is None)
 
 
 @router.get("/gantt/late/{board_id}")
 def get_gantt_late_chart(
         board_id: int,
+        format: GanttFormat = "columnar",
+        viewport: Optional[dict] = Depends(gantt_viewport),
+        if_none_match: Optional[str] = Header(None),
         db: Session = Depends(get_db),
         user: auth.models.User = Depends(utils.get_current_user)
     ):
-    task_input = get_task_data(db, user, board_id)
-    tasks_dict, _, _ = calculate_critical_path(task_input)
-    fig = generate_gantt(tasks_dict, "late_start_date", "late_finish_date")
-    return Response(content=fig.to_json(), media_type="application/json")
+    def render():
+        if format == "plotly":
+            tasks_dict, _, _ = get_board_schedule(db, user, board_id)
+            return generate_gantt(tasks_dict, "late_start_date", "late_finish_date").to_json()
+        index = get_gantt_index(db, user, board_id, "late")
+        return json.dumps(index.query(**viewport) if viewport else index.payload)
+
+    view = f"late.{format}" + (f".{viewport_key(viewport)}" if viewport else "")
+    return render_view(db, user, board_id, view, if_none_match, render, cache=viewport is None)
 
 
 @router.get("/gantt/{board_id}")
 def get_gantt_chart(
         board_id: int,
+        format: GanttFormat = "columnar",
+        viewport: Optional[dict] = Depends(gantt_viewport),
+        if_none_match: Optional[str] = Header(None),
         db: Session = Depends(get_db),
         user: auth.models.User = Depends(utils.get_current_user)
     ):
-    board = db.query(models.Board).filter(models.Board.owner_id == user.id, models.Board.id == board_id).first()
-    if not board:
-        raise HTTPException(status_code=404, detail="Board not found")
-    print(board)
-    tasks = db.query(models.Task).join(models.BoardColumn).filter(
-        models.BoardColumn.board_id == board.id
-    ).options(joinedload(models.Task.parent_tasks)).order_by(models.Task.position).all()
+    def render():
+        if format == "plotly":
+            return generate_planned_gantt(db, board_id).to_json()
+        index = get_gantt_index(db, user, board_id, "planned")
+        return json.dumps(index.query(**viewport) if viewport else index.payload)
 
-    task_data = [{
-        "Task": task.title,
-        "Start Date": task.start_date,
-        "End Date": task.end_date
-    } for task in tasks if task.start_date and task.end_date]
-    print(task_data)
-    if not task_data:
-        raise HTTPException(status_code=400, detail="No tasks with valid start and end dates")
+    view = f"planned.{format}" + (f".{viewport_key(viewport)}" if viewport else "")
+    return render_view(db, user, board_id, view, if_none_match, render, cache=viewport is None)
 
-    df = pd.DataFrame(task_data)
-    df["Start Date"] = pd.to_datetime(df["Start Date"])
-    df["End Date"] = pd.to_datetime(df["End Date"])
-    df = df.sort_values("Start Date")
 
-    min_date = df["Start Date"].min()
-    max_date = df["End Date"].max()
+@router.get("/cpm_graph/{board_id}")
+def get_cpm_graph(
+        board_id: int,
+        if_none_match: Optional[str] = Header(None),
+        db: Session = Depends(get_db),
+        user: auth.models.User = Depends(utils.get_current_user)
+    ):
+    def render():
+        return json.dumps(build_cpm_graph(*get_board_schedule(db, user, board_id)))
 
-    fig = px.timeline(df, x_start="Start Date", x_end="End Date", y="Task")
-    fig.update_yaxes(autorange="reversed")
-    fig.update_layout(xaxis_range=[min_date, max_date])
+    return render_view(db, user, board_id, "cpm_graph", if_none_match, render)
 
-    return Response(content=fig.to_json(), media_type="application/json")
 
+@router.get("/schedule/{board_id}")
+def get_schedule_bundle(
+        board_id: int,
+        fields: str = ",".join(SCHEDULE_FIELDS),
+        format: GanttFormat = "columnar",
+        if_none_match: Optional[str] = Header(None),
+        db: Session = Depends(get_db),
+        user: auth.models.User = Depends(utils.get_current_user)
+    ):
+    selected = parse_schedule_fields(fields)
 
-@router.get("/cpm_graph/{board_id}")
-def get_cpm_graph(
+    def render():
+        return build_schedule_bundle(get_board_schedule(db, user, board_id), selected, format)
+
+    return render_view(db, user, board_id, f"bundle.{format}." + "+".join(selected), if_none_match, render)
+
+
+@router.get("/schedule/{board_id}/export")
+def export_board_schedule(
         board_id: int,
+        format: ExportFormat = "csv",
         db: Session = Depends(get_db),
         user: auth.models.User = Depends(utils.get_current_user)
     ):
-    board = db.query(models.Board).filter(models.Board.owner_id == user.id, models.Board.id == board_id).first()
-    if not board:
-        raise HTTPException(status_code=404, detail="Board not found")
-    
-    tasks = db.query(models.Task).join(models.BoardColumn).filter(
-        models.BoardColumn.board_id == board.id
-    ).options(joinedload(models.Task.parent_tasks)).order_by(models.Task.position).all()
+    return export_schedule(db, user, board_id, format)
 
-    board_data = [{
-        "id": board.id,
-        "tasks": [{
-            "id": task.id,
-            "title": task.title,
-            "Start_Date": str(task.start_date),
-            "End_Date": str(task.end_date),
-            "Depends_on": [parent.id for parent in task.parent_tasks]
-        } for task in tasks]
-    }]
-
-    task_map, graph_map, critical_tasks = cpm.calculate_critical_path(board_data)
-
-    G = nx.DiGraph()
-    for tid, task in task_map.items():
-        G.add_node(tid, label=task["title"], color="red" if tid in critical_tasks else "gray")
-    for source, targets in graph_map.items():
-        for target in targets:
-            is_critical = source in critical_tasks and target in critical_tasks
-            G.add_edge(source, target, color="red" if is_critical else "gray")
-    
-    data = json_graph.node_link_data(G)
-    return JSONResponse(content=data)
+
+@router.get("/simulation/{board_id}")
+def get_schedule_simulation(
+        board_id: int,
+        samples: int = settings.simulation_samples,
+        seed: Optional[int] = None,
+        db: Session = Depends(get_db),
+        user: auth.models.User = Depends(utils.get_current_user)
+    ):
+    return simulate_board(db, user, board_id, samples, seed)
+
+
+@router.post("/scenarios/{board_id}")
+def evaluate_scenarios(
+        board_id: int,
+        scenarios: List[schemas.Scenario],
+        db: Session = Depends(get_db),
+        user: auth.models.User = Depends(utils.get_current_user)
+    ):
+    return evaluate_board_scenarios(db, user, board_id, scenarios)
+
+
+@router.get("/portfolio/")
+def get_portfolio_schedule(
+        db: Session = Depends(get_db),
+        user: auth.models.User = Depends(utils.get_current_user)
+    ):
+    return get_portfolio(db, user)
 
 
 @router.post("/import_csv/", response_model=schemas.BoardOut)
@@ -394,6 +458,8 @@ def import_csv_project(
     ):
 
     contents = file.file.read().decode("utf-8")
+    import pandas as pd
+
     df = pd.read_csv(StringIO(contents))
 
     new_board = models.Board(title=title, description=description, owner_id=user.id)
@@ -11,6 +11,9 @@ class TaskCreate(BaseModel):
     start_date: date
     end_date: date
     parent_ids: Optional[List[int]] = []
+    optimistic_duration: Optional[float] = None
+    likely_duration: Optional[float] = None
+    pessimistic_duration: Optional[float] = None
 
 
 class TaskOut(BaseModel):
@@ -22,11 +25,15 @@ class TaskOut(BaseModel):
     start_date: date
     end_date: date
     parent_ids: List[int] = []
+    optimistic_duration: Optional[float] = None
+    likely_duration: Optional[float] = None
+    pessimistic_duration: Optional[float] = None
 
     model_config = {"from_attributes": True}
 
     @classmethod
     def from_orm(cls, obj):
+        estimate = obj.estimate
         return cls(
             id=obj.id,
             title=obj.title,
@@ -35,7 +42,10 @@ class TaskOut(BaseModel):
             column_id=obj.column_id,
             start_date=obj.start_date,
             end_date=obj.end_date,
-            parent_ids=[parent.id for parent in obj.parent_tasks]
+            parent_ids=[parent.id for parent in obj.parent_tasks],
+            optimistic_duration=estimate.optimistic if estimate else None,
+            likely_duration=estimate.likely if estimate else None,
+            pessimistic_duration=estimate.pessimistic if estimate else None
         )
 
 
@@ -47,6 +57,24 @@ class TaskUpdate(BaseModel):
     start_date: Optional[date] = None
     end_date: Optional[date] = None
     parent_ids: Optional[List[int]] = None
+    optimistic_duration: Optional[float] = None
+    likely_duration: Optional[float] = None
+    pessimistic_duration: Optional[float] = None
+
+
+class ScenarioEdit(BaseModel):
+    task_id: int
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    shift_days: Optional[int] = None
+    duration: Optional[int] = None
+    add_parents: List[int] = []
+    remove_parents: List[int] = []
+
+
+class Scenario(BaseModel):
+    name: Optional[str] = None
+    edits: List[ScenarioEdit]
 
 
 class ColumnCreate(BaseModel):
@@ -1,35 +1,543 @@
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
 from sqlalchemy.orm import Session, joinedload
+from datetime import datetime, timedelta
+from core.cache import TTLCache
+from core.config import get_settings
+from core.database import SessionLocal
+from scheduling.cpm import CycleError, build_csr
+from scheduling.export import MEDIA_TYPES, export_row, stream_rows
+from scheduling.gantt import GanttFormat, GanttIndex, gantt_columns, records_gantt
+from scheduling.montecarlo import simulate
+from scheduling.portfolio import summarize_boards
+from scheduling.records import TaskRecord, epoch_day, link, to_datetime
+from scheduling.scenario import evaluate_scenarios
+from scheduling.state import ScheduleState
 from . import models
 import auth.models
-import pandas as pd
-import plotly.express as px
+import json
+import math
+import numpy as np
 
 
-def get_task_data(db: Session, user: auth.models.User, board_id: int):
+settings = get_settings()
+
+board_schedules = TTLCache(settings.schedule_cache_size, settings.schedule_cache_ttl)
+
+# (board_id, etag) -> rendered JSON body of a schedule view.
+rendered_views = TTLCache(settings.render_cache_size, settings.render_cache_ttl)
+
+# (board_id, schedule version, chart) -> GanttIndex for viewport queries.
+gantt_indexes = TTLCache(settings.gantt_index_cache_size, settings.render_cache_ttl)
+
+GANTT_FIELDS = {
+    "early": ("early_start_date", "early_finish_date"),
+    "late": ("late_start_date", "late_finish_date"),
+    "planned": ("start_date", "end_date")
+}
+
+
+def load_task_records(db: Session, board_id: int):
+    """TaskRecords for a board from two column-only queries, without loading ORM objects."""
+    rows = db.query(
+        models.Task.id, models.Task.title, models.Task.start_date, models.Task.end_date
+    ).join(models.BoardColumn).filter(
+        models.BoardColumn.board_id == board_id,
+        models.Task.start_date.isnot(None),
+        models.Task.end_date.isnot(None)
+    ).order_by(models.Task.position).all()
+
+    edges = db.query(models.task_parents.c.task_id, models.task_parents.c.parent_id).join(
+        models.Task, models.Task.id == models.task_parents.c.task_id
+    ).join(models.BoardColumn).filter(models.BoardColumn.board_id == board_id).all()
+
+    parent_ids = {}
+    for task_id, parent_id in edges:
+        parent_ids.setdefault(task_id, []).append(parent_id)
+
+    records = []
+    for task_id, title, start_date, end_date in rows:
+        start = epoch_day(start_date)
+        records.append(TaskRecord(task_id, title, start, epoch_day(end_date) - start))
+    return link(records, [parent_ids.get(record.id, ()) for record in records])
+
+
+def load_board_schedule(db: Session, board_id: int):
+    """In-memory schedule for writes. Rebuilt when missing or when the
+    published version shows another process has changed the board."""
+    published = db.get(models.BoardSchedule, board_id)
+    version = published.version if published else None
+    state = board_schedules.get(board_id)
+    if state is None or state.version != version:
+        state = ScheduleState.from_records(load_task_records(db, board_id))
+        state.version = version
+        board_schedules.set(board_id, state)
+    return state
+
+
+def schedule_row(board_id: int, task: dict):
+    return {
+        "task_id": task["id"],
+        "board_id": board_id,
+        "early_start": task["early_start_date"],
+        "early_finish": task["early_finish_date"],
+        "late_start": task["late_start_date"],
+        "late_finish": task["late_finish_date"],
+        "total_float": task["total_float"],
+        "free_float": task["free_float"],
+        "critical": task["total_float"] == 0,
+        "depends_on": task["depends_on"]
+    }
+
+
+def publish_schedule(db: Session, board_id: int, state: ScheduleState):
+    """Write the rows that changed since the last publish and bump the board version."""
+    changed, removed, full = state.take_changes()
+    tasks = state.entries(changed)
+    try:
+        rows = db.query(models.TaskSchedule).filter(models.TaskSchedule.board_id == board_id)
+        if full:
+            rows.delete(synchronize_session=False)
+        else:
+            stale = list(removed | tasks.keys())
+            for i in range(0, len(stale), 500):
+                rows.filter(models.TaskSchedule.task_id.in_(stale[i:i + 500])).delete(synchronize_session=False)
+        if tasks:
+            db.execute(insert(models.TaskSchedule), [schedule_row(board_id, task) for task in tasks.values()])
+
+        published = db.get(models.BoardSchedule, board_id)
+        if published is None:
+            published = models.BoardSchedule(board_id=board_id, version=0)
+            db.add(published)
+        published.version += 1
+        published.project_start = to_datetime(int(state.start_days.min())) if len(state) else None
+        published.project_duration = state.project_duration
+        published.updated_at = datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+        board_schedules.pop(board_id)
+        raise
+    state.version = published.version
+
+
+def refresh_schedule(db: Session, board_id: int, change=None):
+    try:
+        state = load_board_schedule(db, board_id)
+        if change:
+            change(state)
+    except CycleError:
+        invalidate_schedule(db, board_id)
+        return
+    publish_schedule(db, board_id, state)
+
+
+def read_schedule(db: Session, board_id: int):
+    """(tasks, graph, critical) for a board from the materialized schedule tables."""
+    if db.get(models.BoardSchedule, board_id) is None:
+        try:
+            publish_schedule(db, board_id, load_board_schedule(db, board_id))
+        except CycleError:
+            raise HTTPException(status_code=400, detail="Task dependencies contain a cycle")
+
+    rows = db.query(models.TaskSchedule, models.Task.title, models.Task.start_date, models.Task.end_date).join(
+        models.Task, models.Task.id == models.TaskSchedule.task_id
+    ).filter(models.TaskSchedule.board_id == board_id).all()
+
+    tasks = {}
+    graph = {}
+    critical_tasks = set()
+    for row, title, start_date, end_date in rows:
+        tasks[row.task_id] = {
+            "id": row.task_id,
+            "title": title,
+            "start_date": start_date,
+            "end_date": end_date,
+            "depends_on": row.depends_on,
+            "total_float": row.total_float,
+            "free_float": row.free_float,
+            "early_start_date": row.early_start,
+            "early_finish_date": row.early_finish,
+            "late_start_date": row.late_start,
+            "late_finish_date": row.late_finish
+        }
+        if row.critical:
+            critical_tasks.add(row.task_id)
+    for tid, task in tasks.items():
+        for parent in task["depends_on"]:
+            if parent in tasks:
+                graph.setdefault(parent, []).append(tid)
+    return tasks, graph, critical_tasks
+
+
+def get_board_schedule(db: Session, user: auth.models.User, board_id: int):
     board = db.query(models.Board).filter(models.Board.owner_id == user.id, models.Board.id == board_id).first()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
-    
-    tasks = db.query(models.Task).join(models.BoardColumn).filter(
-        models.BoardColumn.board_id == board.id
-    ).options(joinedload(models.Task.parent_tasks)).order_by(models.Task.position).all()
 
-    task_data = [{
-        "id": task.id,
-        "title": task.title,
-        "Start_Date": task.start_date.strftime("%Y-%m-%d"),
-        "End_Date": task.end_date.strftime("%Y-%m-%d"),
-        "Depends_on": [p.id for p in task.parent_tasks] if task.parent_tasks else []
-    } for task in tasks if task.start_date and task.end_date]
+    schedule = read_schedule(db, board.id)
+    if not schedule[0]:
+        raise HTTPException(status_code=400, detail="No tasks with valid start and end dates")
+    return schedule
 
-    if not task_data:
+
+def schedule_etag(db: Session, board_id: int):
+    """Validator for everything derived from the board's tasks, or None when the
+    schedule cannot be published (a legacy cycle). The version restarts after an
+    invalidation, so the publish time is part of it."""
+    published = db.get(models.BoardSchedule, board_id)
+    if published is None:
+        try:
+            publish_schedule(db, board_id, load_board_schedule(db, board_id))
+        except CycleError:
+            return None
+        published = db.get(models.BoardSchedule, board_id)
+    return f"{board_id}.{published.version}.{published.updated_at:%Y%m%d%H%M%S%f}"
+
+
+def render_view(db: Session, user: auth.models.User, board_id: int, view: str, if_none_match, render, cache=True):
+    """Conditional GET for a schedule view: 304 when the client's ETag is current,
+    otherwise the body from `rendered_views` or from `render()`. Bodies of views
+    rendered with `cache=False` are not kept."""
+    board = db.query(models.Board).filter(models.Board.owner_id == user.id, models.Board.id == board_id).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    version = schedule_etag(db, board.id)
+    if version is None:
+        return Response(content=render(), media_type="application/json")
+
+    etag = f'"{version}.{view}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    content = rendered_views.get((board.id, etag)) if cache else None
+    if content is None:
+        content = render()
+        if cache:
+            rendered_views.set((board.id, etag), content)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def get_gantt_index(db: Session, user: auth.models.User, board_id: int, chart: str):
+    version = schedule_etag(db, board_id)
+    index = gantt_indexes.get((board_id, version, chart)) if version else None
+    if index is None:
+        if chart == "planned":
+            # Stored dates only, like the full planned chart, so no CPM and no cycle check.
+            records = load_task_records(db, board_id)
+            if not records:
+                raise HTTPException(status_code=400, detail="No tasks with valid start and end dates")
+            index = GanttIndex(records_gantt(records))
+        else:
+            tasks_dict, _, critical_tasks = get_board_schedule(db, user, board_id)
+            start_field, end_field = GANTT_FIELDS[chart]
+            index = GanttIndex(gantt_columns(tasks_dict, start_field, end_field, critical_tasks))
+        if version:
+            gantt_indexes.set((board_id, version, chart), index)
+    return index
+
+
+def viewport_key(viewport):
+    return "&".join(f"{name}={value}" for name, value in viewport.items() if value is not None)
+
+
+def export_schedule_rows(board_id: int):
+    """Export rows for a published board schedule, read in batches on a session of
+    their own because the generator outlives the request's session."""
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            models.Task.id, models.Task.title, models.Task.start_date, models.Task.end_date,
+            models.TaskSchedule.early_start, models.TaskSchedule.early_finish,
+            models.TaskSchedule.late_start, models.TaskSchedule.late_finish,
+            models.TaskSchedule.total_float, models.TaskSchedule.free_float,
+            models.TaskSchedule.critical, models.TaskSchedule.depends_on
+        ).join(models.TaskSchedule, models.TaskSchedule.task_id == models.Task.id).filter(
+            models.TaskSchedule.board_id == board_id
+        ).order_by(models.TaskSchedule.early_start, models.Task.id).yield_per(settings.export_batch_size)
+        for row in rows:
+            yield export_row(*row)
+    finally:
+        db.close()
+
+
+def export_schedule(db: Session, user: auth.models.User, board_id: int, format: str):
+    board = db.query(models.Board).filter(models.Board.owner_id == user.id, models.Board.id == board_id).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    if schedule_etag(db, board.id) is None:
+        raise HTTPException(status_code=400, detail="Task dependencies contain a cycle")
+
+    return StreamingResponse(
+        stream_rows(export_schedule_rows(board.id), format, settings.export_batch_size),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="board-{board.id}-schedule.{format}"'}
+    )
+
+
+def check_dependencies(db: Session, board_id: int, task_id: int, parent_ids):
+    try:
+        state = load_board_schedule(db, board_id)
+    except CycleError:
+        # Boards saved before cycles were rejected must stay editable so the cycle can be removed.
+        return
+    cycle = state.find_cycle(task_id, parent_ids)
+    if cycle:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dependency cycle: {' -> '.join(str(tid) for tid in cycle)}"
+        )
+
+
+def schedule_task(db: Session, board_id: int, task: models.Task):
+    refresh_schedule(db, board_id, lambda state: state.upsert_task(
+        task.id, task.title, task.start_date, task.end_date, [p.id for p in task.parent_tasks]
+    ))
+
+
+def unschedule_task(db: Session, board_id: int, task_id: int):
+    refresh_schedule(db, board_id, lambda state: state.remove_task(task_id))
+
+
+def invalidate_schedule(db: Session, board_id: int):
+    board_schedules.pop(board_id)
+    db.query(models.TaskSchedule).filter(models.TaskSchedule.board_id == board_id).delete(synchronize_session=False)
+    db.query(models.BoardSchedule).filter(models.BoardSchedule.board_id == board_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def build_cpm_graph(task_map, graph_map, critical_tasks):
+    import networkx as nx
+    from networkx.readwrite import json_graph
+
+    G = nx.DiGraph()
+    for tid, task in task_map.items():
+        G.add_node(tid, label=task["title"], color="red" if tid in critical_tasks else "gray")
+    for source, targets in graph_map.items():
+        for target in targets:
+            is_critical = source in critical_tasks and target in critical_tasks
+            G.add_edge(source, target, color="red" if is_critical else "gray")
+    return json_graph.node_link_data(G)
+
+
+SCHEDULE_FIELDS = ("early", "late", "planned", "critical", "slack", "edges", "graph")
+
+
+def parse_schedule_fields(fields: str):
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in SCHEDULE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown schedule fields: {', '.join(unknown)}. Allowed: {', '.join(SCHEDULE_FIELDS)}"
+        )
+    return [field for field in SCHEDULE_FIELDS if field in selected]
+
+
+def build_schedule_bundle(schedule, fields, format: GanttFormat = "columnar"):
+    """JSON body with only the requested parts of the schedule, built from one read."""
+    task_map, graph_map, critical_tasks = schedule
+    parts = {}
+    for field in fields:
+        if field in GANTT_FIELDS:
+            start_field, end_field = GANTT_FIELDS[field]
+            if format == "plotly":
+                parts[field] = generate_gantt(task_map, start_field, end_field).to_json()
+            else:
+                parts[field] = json.dumps(gantt_columns(task_map, start_field, end_field, critical_tasks))
+        elif field == "critical":
+            parts[field] = json.dumps(sorted(critical_tasks))
+        elif field == "slack":
+            parts[field] = json.dumps([{
+                "id": tid,
+                "total_float": task["total_float"],
+                "free_float": task["free_float"]
+            } for tid, task in task_map.items()])
+        elif field == "edges":
+            parts[field] = json.dumps([[source, target] for source, targets in graph_map.items() for target in targets])
+        elif field == "graph":
+            parts[field] = json.dumps(build_cpm_graph(task_map, graph_map, critical_tasks))
+
+    # Parts are serialized on their own (plotly does its own encoding), so splice them in.
+    return "{" + ",".join(f'"{field}":{value}' for field, value in parts.items()) + "}"
+
+
+ESTIMATE_FIELDS = {
+    "optimistic_duration": "optimistic",
+    "likely_duration": "likely",
+    "pessimistic_duration": "pessimistic"
+}
+
+
+def apply_estimate(task: models.Task, values: dict):
+    """Merge three-point estimate fields (days) into the task's estimate row."""
+    estimate = task.estimate or models.TaskEstimate()
+    for field, column in ESTIMATE_FIELDS.items():
+        if field in values:
+            setattr(estimate, column, values[field])
+
+    given = [value for value in (estimate.optimistic, estimate.likely, estimate.pessimistic) if value is not None]
+    if any(value < 0 for value in given) or given != sorted(given):
+        raise HTTPException(
+            status_code=400,
+            detail="Estimates must be non-negative and ordered optimistic <= likely <= pessimistic"
+        )
+    task.estimate = estimate if given else None
+
+
+def simulate_board(db: Session, user: auth.models.User, board_id: int, samples: int, seed=None):
+    board = db.query(models.Board).filter(models.Board.owner_id == user.id, models.Board.id == board_id).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    if not 0 < samples <= settings.simulation_max_samples:
+        raise HTTPException(status_code=400, detail=f"samples must be between 1 and {settings.simulation_max_samples}")
+
+    records = load_task_records(db, board.id)
+    if not records:
         raise HTTPException(status_code=400, detail="No tasks with valid start and end dates")
 
-    return [{"tasks": task_data}]
+    estimates = {estimate.task_id: estimate for estimate in db.query(models.TaskEstimate).join(
+        models.Task, models.Task.id == models.TaskEstimate.task_id
+    ).join(models.BoardColumn).filter(models.BoardColumn.board_id == board.id)}
+
+    # Missing estimates fall back to the planned duration, which makes the task deterministic.
+    optimistic = []
+    likely = []
+    pessimistic = []
+    for record in records:
+        estimate = estimates.get(record.id)
+        planned = record.duration
+        mode = estimate.likely if estimate and estimate.likely is not None else planned
+        optimistic.append(estimate.optimistic if estimate and estimate.optimistic is not None else min(mode, planned))
+        likely.append(mode)
+        pessimistic.append(estimate.pessimistic if estimate and estimate.pessimistic is not None else max(mode, planned))
+    sources = [p for record in records for p in record.parents]
+    targets = [i for i, record in enumerate(records) for _ in record.parents]
+    indptr, indices = build_csr(len(records), sources, targets)
+
+    try:
+        durations, criticality = simulate(
+            indptr, indices, optimistic, likely, pessimistic, samples, seed,
+            chunk_size=settings.simulation_chunk_size,
+            workers=settings.simulation_workers
+        )
+    except CycleError:
+        raise HTTPException(status_code=400, detail="Task dependencies contain a cycle")
+
+    project_start = to_datetime(min(record.start for record in records)).date()
+    percentiles = {}
+    for percent, value in zip((50, 80, 95), np.percentile(durations, (50, 80, 95)).tolist()):
+        percentiles[f"p{percent}"] = {
+            "duration": round(value, 2),
+            "finish_date": (project_start + timedelta(days=math.ceil(value - 1e-3))).isoformat()
+        }
+
+    return {
+        "samples": samples,
+        "project_start": project_start.isoformat(),
+        "mean_duration": round(float(durations.mean()), 2),
+        "percentiles": percentiles,
+        "tasks": [{
+            "id": record.id,
+            "title": record.title,
+            "optimistic": optimistic[i],
+            "likely": likely[i],
+            "pessimistic": pessimistic[i],
+            "criticality": round(float(criticality[i]), 4)
+        } for i, record in enumerate(records)]
+    }
+
+
+def evaluate_board_scenarios(db: Session, user: auth.models.User, board_id: int, scenarios):
+    board = db.query(models.Board).filter(models.Board.owner_id == user.id, models.Board.id == board_id).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    if not 0 < len(scenarios) <= settings.scenario_max_batch:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {settings.scenario_max_batch} scenarios per request")
+
+    try:
+        state = load_board_schedule(db, board.id)
+    except CycleError:
+        raise HTTPException(status_code=400, detail="Task dependencies contain a cycle")
+
+    batch = []
+    for i, scenario in enumerate(scenarios):
+        edits = []
+        for edit in scenario.edits:
+            unknown = [tid for tid in (edit.task_id, *edit.add_parents, *edit.remove_parents) if tid not in state.durations]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Tasks not scheduled on this board: {sorted(set(unknown))}")
+            edits.append({
+                "task_id": edit.task_id,
+                "start": epoch_day(edit.start_date) if edit.start_date else None,
+                "end": epoch_day(edit.end_date) if edit.end_date else None,
+                "shift_days": edit.shift_days,
+                "duration": edit.duration,
+                "add_parents": edit.add_parents,
+                "remove_parents": edit.remove_parents
+            })
+        batch.append((scenario.name or f"scenario {i + 1}", edits))
+    return evaluate_scenarios(state, batch)
+
+
+def get_portfolio(db: Session, user: auth.models.User):
+    # One pass over every board, column and task the user owns; boards without tasks still get a row.
+    rows = db.query(
+        models.Board.id, models.Board.title, models.Task.id, models.Task.start_date, models.Task.end_date
+    ).outerjoin(models.BoardColumn, models.BoardColumn.board_id == models.Board.id).outerjoin(
+        models.Task, models.Task.column_id == models.BoardColumn.id
+    ).filter(models.Board.owner_id == user.id).order_by(models.Board.id).all()
+
+    edges = db.query(models.task_parents.c.task_id, models.task_parents.c.parent_id).join(
+        models.Task, models.Task.id == models.task_parents.c.task_id
+    ).join(models.BoardColumn).join(models.Board).filter(models.Board.owner_id == user.id).all()
+
+    titles = {}
+    index = {}
+    starts = {}
+    durations = {}
+    for board_id, title, task_id, start_date, end_date in rows:
+        titles[board_id] = title
+        days = starts.setdefault(board_id, [])
+        durations.setdefault(board_id, [])
+        if task_id is None or start_date is None or end_date is None:
+            continue
+        start = epoch_day(start_date)
+        index[task_id] = (board_id, len(days))
+        days.append(start)
+        durations[board_id].append(epoch_day(end_date) - start)
+
+    sources = {board_id: [] for board_id in titles}
+    targets = {board_id: [] for board_id in titles}
+    for task_id, parent_id in edges:
+        child = index.get(task_id)
+        parent = index.get(parent_id)
+        if child and parent and child[0] == parent[0]:
+            sources[child[0]].append(parent[1])
+            targets[child[0]].append(child[1])
+
+    boards = [(
+        board_id,
+        np.array(starts[board_id], dtype=np.int64),
+        np.array(durations[board_id], dtype=np.int64),
+        np.array(sources[board_id], dtype=np.int64),
+        np.array(targets[board_id], dtype=np.int64)
+    ) for board_id in titles]
+    summaries = summarize_boards(boards, settings.portfolio_workers, settings.portfolio_batch_size)
+
+    return {
+        "board_count": len(titles),
+        "boards": [{"id": board_id, "title": title, **summaries[board_id]} for board_id, title in titles.items()]
+    }
 
 
 def generate_gantt(tasks_dict, start_field, end_field):
+    import pandas as pd
+    import plotly.express as px
+
     data = []
     for task in tasks_dict.values():
         data.append({
@@ -43,3 +551,33 @@ def generate_gantt(tasks_dict, start_field, end_field):
     fig.update_yaxes(autorange="reversed")
     fig.update_layout(xaxis_range=[df["Start Date"].min(), df["End Date"].max()])
     return fig
+
+
+def generate_planned_gantt(db: Session, board_id: int):
+    import pandas as pd
+    import plotly.express as px
+
+    tasks = db.query(models.Task).join(models.BoardColumn).filter(
+        models.BoardColumn.board_id == board_id
+    ).options(joinedload(models.Task.parent_tasks)).order_by(models.Task.position).all()
+
+    task_data = [{
+        "Task": task.title,
+        "Start Date": task.start_date,
+        "End Date": task.end_date
+    } for task in tasks if task.start_date and task.end_date]
+    if not task_data:
+        raise HTTPException(status_code=400, detail="No tasks with valid start and end dates")
+
+    df = pd.DataFrame(task_data)
+    df["Start Date"] = pd.to_datetime(df["Start Date"])
+    df["End Date"] = pd.to_datetime(df["End Date"])
+    df = df.sort_values("Start Date")
+
+    min_date = df["Start Date"].min()
+    max_date = df["End Date"].max()
+
+    fig = px.timeline(df, x_start="Start Date", x_end="End Date", y="Task")
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(xaxis_range=[min_date, max_date])
+    return fig
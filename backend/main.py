@@ -4,6 +4,8 @@ from core.database import create_db_and_tables
 from auth.routes import router as auth_router
 from kanban.routes import router as kanban_router
 from mattermost.routes import router as mattermost_router
+from mattermost.client import close_session
+from scheduling.pool import shutdown_executor
 
 
 app = FastAPI(
@@ -24,6 +26,11 @@ app.add_middleware(
 def on_startup():
     create_db_and_tables()
 
+@app.on_event("shutdown")
+def on_shutdown():
+    close_session()
+    shutdown_executor()
+
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(kanban_router, prefix="/kanban", tags=["kanban"])
 app.include_router(mattermost_router, prefix="/mattermost", tags=["mattermost"])
@@ -1,168 +1,135 @@
+from fastapi import HTTPException
 from datetime import datetime
-import requests
+from core.config import get_settings
+from . import client
+from .client import MATTERMOST_API, FOCALBOARD_API
+from .board_schema import BoardSchema, board_schemas
+import asyncio
 import random
 import string
 
 
+settings = get_settings()
+
+
 def get_mattermost_token(login_id, password):
-    url = "https://mattermost.portabo.cz/api/v4/users/login"
     headers = {
-        "X-Requested-With": "XMLHttpRequest",
         "Content-Type": "application/x-www-form-urlencoded"
     }
     data = '{"login_id":"' + login_id + '","password":"' + password + '"}'
-    response = requests.post(url, headers=headers, data=data)
+    response = client.post(None, f"{MATTERMOST_API}/users/login", headers=headers, data=data)
     token = response.headers["Token"]
     return token
 
 
 def get_user(token):
-    url = "https://mattermost.portabo.cz/api/v4/users/me"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{MATTERMOST_API}/users/me")
     return response
 
 
 def get_sessions(token, user_id):
-    url = f"https://mattermost.portabo.cz/api/v4/users/{user_id}/sessions"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{MATTERMOST_API}/users/{user_id}/sessions")
     return response
 
 
 def revoke_session(token, user_id, session_id):
-    url = f"https://mattermost.portabo.cz/api/v4/users/{user_id}/sessions/revoke"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     data = {
         "session_id": session_id
     }
-    response = requests.post(url, headers=headers, json=data)
+    response = client.post(token, f"{MATTERMOST_API}/users/{user_id}/sessions/revoke", json=data)
     return response
 
 
 def get_teams(token):
-    url = "https://mattermost.portabo.cz/plugins/focalboard/api/v2/teams"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{FOCALBOARD_API}/teams")
     return response
 
 
 def get_boards(token, team_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/teams/{team_id}/boards"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{FOCALBOARD_API}/teams/{team_id}/boards")
     return response
 
 
 def get_templates(token, team_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/teams/{team_id}/templates"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{FOCALBOARD_API}/teams/{team_id}/templates")
     return response
 
 
 def get_board(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
-    return response
+    response = client.get(token, f"{FOCALBOARD_API}/boards/{board_id}")
+    if response.ok:
+        board_schemas.set(board_id, BoardSchema(board_id, response.json().get("cardProperties", [])))
+    return response
+
+
+def get_board_schema(token, board_id):
+    schema = board_schemas.get(board_id)
+    if schema is None:
+        response = get_board(token, board_id)
+        if not response.ok:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch board")
+        schema = board_schemas.get(board_id)
+    return schema
+
+
+def get_board_options(token, board_id, name):
+    # Fetched fresh: the result is patched back as the complete option list,
+    # so a cached copy would drop options added since it was cached.
+    response = get_board(token, board_id)
+    if not response.ok:
+        raise HTTPException(status_code=response.status_code, detail="Failed to fetch board")
+    for prop in response.json().get("cardProperties", []):
+        if prop["name"] == name:
+            return prop.get("options", [])
+    return []
+
+
+def invalidate_board_schema(board_id, response=None):
+    # A successful board PATCH answers with the updated board, which is
+    # cheaper to cache right away than to refetch on the next lookup.
+    if response is not None and response.ok:
+        try:
+            card_properties = response.json().get("cardProperties")
+        except ValueError:
+            card_properties = None
+        if card_properties is not None:
+            board_schemas.set(board_id, BoardSchema(board_id, card_properties))
+            return
+    board_schemas.pop(board_id)
 
 
 def create_board(token, team_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/bbzj7aho8dtrx8emw8p4arkj1bw/duplicate?asTemplate=false&toTeam={team_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.post(url, headers=headers)
+    template_id = settings.mattermost_template_board_id
+    response = client.post(token, f"{FOCALBOARD_API}/boards/{template_id}/duplicate?asTemplate=false&toTeam={team_id}")
     return response
 
 
 def delete_board(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.delete(url, json={}, headers=headers)
+    response = client.delete(token, f"{FOCALBOARD_API}/boards/{board_id}", json={})
+    invalidate_board_schema(board_id)
     return response
 
 
 def get_cards(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/cards"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{FOCALBOARD_API}/boards/{board_id}/cards")
     return response
 
 
 def get_blocks(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks")
     return response
 
 
 def patch_board(token, board_id, title, description):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     data = {
         "title": title,
         "description": description
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
     return response
 
 
 def create_column(token, board_id, columns, new_column):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-
     characters = string.ascii_letters + string.digits
     id = ''.join(random.choices(characters, k=27)).lower()
     new_column = {
@@ -173,10 +140,11 @@ def create_column(token, board_id, columns, new_column):
     columns.append(new_column)
     new_columns = columns
 
+    status_property_id = get_board_schema(token, board_id).property_id("Status")
     data = {
         "updatedCardProperties":[
             {
-                "id":"a972dc7a-5f4c-45d2-8044-8c28c69717f1",
+                "id":status_property_id,
                 "name":"Status",
                 "options":new_columns,
                 "type":"select"
@@ -185,27 +153,22 @@ def create_column(token, board_id, columns, new_column):
         "deletedCardProperties":[]
     }
 
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def rename_column(token, board_id, column_id, columns, new_name):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-
     for column in columns:
         if column["id"] == column_id:
             column["value"] = new_name
             break
-    
+
+    status_property_id = get_board_schema(token, board_id).property_id("Status")
     data = {
         "updatedCardProperties":[
             {
-                "id":"a972dc7a-5f4c-45d2-8044-8c28c69717f1",
+                "id":status_property_id,
                 "name":"Status",
                 "type":"select",
                 "options":columns
@@ -214,27 +177,22 @@ def rename_column(token, board_id, column_id, columns, new_name):
         "deletedCardProperties":[]
     }
 
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def delete_column(token, board_id, column_id, columns):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-
     for i, column in enumerate(columns):
         if column["id"] == column_id:
             del columns[i]
             break
-    
+
+    status_property_id = get_board_schema(token, board_id).property_id("Status")
     data = {
         "updatedCardProperties":[
             {
-                "id":"a972dc7a-5f4c-45d2-8044-8c28c69717f1",
+                "id":status_property_id,
                 "name":"Status",
                 "type":"select",
                 "options":columns
@@ -243,81 +201,79 @@ def delete_column(token, board_id, column_id, columns):
         "deletedCardProperties":[]
     }
 
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def create_task(token, board_id, column_id, title, description_property_id, description):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
+    status_property_id = get_board_schema(token, board_id).property_id("Status")
+    properties = {
+        status_property_id:column_id,
+        description_property_id:description
     }
+    data = [build_card_block(board_id, title, properties)]
+
+    response = client.post(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks", json=data)
+    return response
 
+
+def generate_id():
     characters = string.ascii_letters + string.digits
-    id = ''.join(random.choices(characters, k=27)).lower()
+    return ''.join(random.choices(characters, k=27)).lower()
+
+
+def build_card_block(board_id, title, properties):
+    id = generate_id()
     now = int(datetime.utcnow().timestamp() * 1000)
-    data = [
-        {
-            "id":id,
-            "schema":1,
-            "boardId":board_id,
-            "parentId":board_id,
-            "createdBy":"",
-            "modifiedBy":"",
-            "type":"card",
-            "fields":{
-                "properties":{
-                    "a972dc7a-5f4c-45d2-8044-8c28c69717f1":column_id,
-                    description_property_id:description
-                },
-                "contentOrder":[],
-                "isTemplate":False
-            },
-            "title":title,
-            "createAt":now,
-            "updateAt":now,
-            "deleteAt":0,
-            "limited":False
-        }
-    ]
+    return {
+        "id":id,
+        "schema":1,
+        "boardId":board_id,
+        "parentId":board_id,
+        "createdBy":"",
+        "modifiedBy":"",
+        "type":"card",
+        "fields":{
+            "properties":properties,
+            "contentOrder":[],
+            "isTemplate":False
+        },
+        "title":title,
+        "createAt":now,
+        "updateAt":now,
+        "deleteAt":0,
+        "limited":False
+    }
+
 
-    response = requests.post(url, json=data, headers=headers)
+def create_tasks(token, board_id, blocks):
+    response = client.post(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks", json=blocks)
     return response
 
 
-def delete_task(token, board_id, task_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks/{task_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
+def patch_tasks(token, board_id, block_ids, block_patches):
+    data = {
+        "block_ids":block_ids,
+        "block_patches":block_patches
     }
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/", json=data)
+    return response
+
+
+def delete_task(token, board_id, task_id):
     data = {}
-    response = requests.delete(url, json=data, headers=headers)
+    response = client.delete(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{task_id}", json=data)
     return response
 
 
 def rename_task(token, board_id, task_id, new_title):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks/{task_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     data = {"title":new_title}
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{task_id}", json=data)
     return response
 
 
 def set_new_task_position(token, board_id, block_id, tasks_order, task_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     tasks_order.append(task_id)
     new_tasks_order = tasks_order
     data = {
@@ -325,24 +281,29 @@ def set_new_task_position(token, board_id, block_id, tasks_order, task_id):
             "cardOrder":new_tasks_order
         }
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{block_id}", json=data)
+    return response
+
+
+def set_card_order(token, board_id, block_id, card_order):
+    data = {
+        "updatedFields":{
+            "cardOrder":card_order
+        }
+    }
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{block_id}", json=data)
     return response
 
 
 def change_task_columm(token, board_id, column_id, task_id):
+    status_property_id = get_board_schema(token, board_id).property_id("Status")
     tasks = get_cards(token, board_id).json()
     for task in tasks:
         if task["id"] == task_id:
             current_properties = task["properties"]
-            current_properties["a972dc7a-5f4c-45d2-8044-8c28c69717f1"] = column_id
+            current_properties[status_property_id] = column_id
             break
-    
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks/{task_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
+
     data = {
         "updatedFields":{
             "properties":current_properties,
@@ -350,7 +311,7 @@ def change_task_columm(token, board_id, column_id, task_id):
         },
         "deletedFields":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{task_id}", json=data)
     return response
 
 
@@ -360,30 +321,18 @@ def set_task_order(token, board_id, task_list, block_id, task_id):
         if task["id"] == task_id:
             current_properties = task["properties"]
             break
-    
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
+
     data = {
         "updatedFields":{
             "properties":current_properties,
             "cardOrder":task_list
         }
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{block_id}", json=data)
     return response
 
 
 def add_description_property(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     characters = string.ascii_letters + string.digits
     id = ''.join(random.choices(characters, k=27)).lower()
     data = {
@@ -399,61 +348,44 @@ def add_description_property(token, board_id):
         "updatedProperties":{},
         "deletedProperties":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def set_task_properties(token, board_id, task_id, description, start_date, end_date, depends_on, assignee_id, column_id):
-    board = get_board(token, board_id).json()
-    properties = board["cardProperties"]
-    for property in properties:
-        if property["name"] == "Status":
-            status_property_id = property["id"]
-        elif property["name"] == "Description":
-            description_property_id = property["id"]
-        elif property["name"] == "Start Date":
-            start_date_property_id = property["id"]
-        elif property["name"] == "End Date":
-            end_date_property_id = property["id"]
-        elif property["name"] == "Depends on":
-            depends_on_property_id = property["id"]
-        elif property["name"] == "Assignee":
-            assignee_property_id = property["id"]
-    
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks/{task_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
+    schema = get_board_schema(token, board_id)
+    values = {
+        "Status": column_id,
+        "Description": description,
+        "Start Date": start_date,
+        "End Date": end_date,
+        "Depends on": depends_on,
+        "Assignee": assignee_id
     }
+    properties = {
+        schema.property_id(name): value
+        for name, value in values.items()
+        if schema.property_id(name) is not None
+    }
+
     data = {
         "updatedFields":
         {
-            "properties":
-            {
-                status_property_id:column_id,
-                description_property_id:description,
-                start_date_property_id:start_date,
-                end_date_property_id:end_date,
-                depends_on_property_id:depends_on,
-                assignee_property_id:assignee_id
-            },
+            "properties":properties,
             "contentOrder":[]
         },
         "deletedFields":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{task_id}", json=data)
     return response
 
 
-def set_depends_on_options(token, board_id):
-    board = get_board(token, board_id).json()
-    properties = board["cardProperties"]
-    for property in properties:
-        if property["name"] == "Depends on":
-            depends_on_property_id = property["id"]
-    
-    tasks = get_cards(token, board_id).json()
+def set_depends_on_options(token, board_id, tasks=None):
+    depends_on_property_id = get_board_schema(token, board_id).property_id("Depends on")
+
+    if tasks is None:
+        tasks = get_cards(token, board_id).json()
     options = []
     for task in tasks:
         options.append({
@@ -461,13 +393,7 @@ def set_depends_on_options(token, board_id):
             "value":task.get("title"),
             "color":"propColorDefault"
         })
-    
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
+
     data = {
         "updatedCardProperties":[
             {
@@ -479,17 +405,12 @@ def set_depends_on_options(token, board_id):
         ],
         "deletedCardProperties":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def add_start_date_property(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     characters = string.ascii_letters + string.digits
     id = ''.join(random.choices(characters, k=27)).lower()
     data = {
@@ -505,17 +426,12 @@ def add_start_date_property(token, board_id):
         "updatedProperties":{},
         "deletedProperties":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def add_end_date_property(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     characters = string.ascii_letters + string.digits
     id = ''.join(random.choices(characters, k=27)).lower()
     data = {
@@ -531,17 +447,12 @@ def add_end_date_property(token, board_id):
         "updatedProperties":{},
         "deletedProperties":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def add_depends_on_property(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     characters = string.ascii_letters + string.digits
     id = ''.join(random.choices(characters, k=27)).lower()
     data = {
@@ -557,21 +468,17 @@ def add_depends_on_property(token, board_id):
         "updatedProperties":{},
         "deletedProperties":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def change_depends_on_option(token, board_id, options):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
+    depends_on_property_id = get_board_schema(token, board_id).property_id("Depends on")
     data = {
         "updatedCardProperties":[
             {
-                "id":"z2epbzkfhjcp1kmr4s9ukyvlpzd",
+                "id":depends_on_property_id,
                 "name":"Depends on",
                 "type":"multiSelect",
                 "options":options
@@ -579,51 +486,46 @@ def change_depends_on_option(token, board_id, options):
         ],
         "deletedCardProperties":[]
     }
-    response = requests.patch(url, json=data, headers=headers)
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
+    return response
+
+
+def patch_board_schema(token, board_id, card_properties, title=None, description=None):
+    data = {
+        "updatedCardProperties":card_properties,
+        "deletedCardProperties":[]
+    }
+    if title is not None:
+        data["title"] = title
+    if description is not None:
+        data["description"] = description
+    response = client.patch(token, f"{FOCALBOARD_API}/boards/{board_id}", json=data)
+    invalidate_board_schema(board_id, response)
     return response
 
 
 def get_users_in_team(token, team_id, query):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/teams/{team_id}/users?search={query}&exclude_bots=true"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
+    params = {
+        "search": query,
+        "exclude_bots": "true"
     }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{FOCALBOARD_API}/teams/{team_id}/users", params=params)
     return response
 
 
 def get_board_members(token, board_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/members"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.get(url, headers=headers)
+    response = client.get(token, f"{FOCALBOARD_API}/boards/{board_id}/members")
     return response
 
 
 def get_board_members_usernames(token, team_id, user_ids):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/teams/{team_id}/users"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     data = [id for id in user_ids]
-    response = requests.post(url, json=data, headers=headers)
+    response = client.post(token, f"{FOCALBOARD_API}/teams/{team_id}/users", json=data)
     return response
 
 
 def add_member_to_board(token, board_id, user_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/members"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
     data = {
         "boardId":board_id,
         "userId":user_id,
@@ -633,50 +535,77 @@ def add_member_to_board(token, board_id, user_id):
         "schemeCommenter":True,
         "schemeViewer":True
     }
-    response = requests.post(url, json=data, headers=headers)
+    response = client.post(token, f"{FOCALBOARD_API}/boards/{board_id}/members", json=data)
     return response
 
 
 def remove_member_from_board(token, board_id, member_id):
-    url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/members/{member_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "X-Requested-With": "XMLHttpRequest"
-    }
-    response = requests.delete(url, headers=headers)
+    response = client.delete(token, f"{FOCALBOARD_API}/boards/{board_id}/members/{member_id}")
     return response
 
 
+def patch_tasks_each(token, board_id, block_ids, block_patches):
+    """One PATCH per card, at most mattermost_fanout_limit in flight. Responses keep the input order."""
+    # async_client imports this module, so it can only be imported here.
+    from .async_client import AsyncFocalboardClient
+
+    focalboard = AsyncFocalboardClient(token)
+
+    async def patch_all():
+        return await asyncio.gather(*(
+            focalboard.call(client.patch, f"{FOCALBOARD_API}/boards/{board_id}/blocks/{block_id}", json=patch)
+            for block_id, patch in zip(block_ids, block_patches)
+        ))
+
+    return asyncio.run(patch_all())
+
+
 def remove_member_from_all_task(token, board_id, member_id):
+    assignee_property_id = get_board_schema(token, board_id).property_id("Assignee")
+    result = {"unassigned_tasks": [], "failed_tasks": []}
+    if assignee_property_id is None:
+        return result
+
+    block_ids = []
+    block_patches = []
     cards = get_cards(token, board_id).json()
     for card in cards:
-        task_id = card["id"]
         properties = card["properties"]
-        assigned_member = properties.get("axkhqa4jxr3jcqe4k87g8bhmary")
-        
-        if assigned_member is None:
-            continue
+        assigned_member = properties.get(assignee_property_id)
+
+        if isinstance(assigned_member, list) and member_id in assigned_member:
+            properties[assignee_property_id] = [user_id for user_id in assigned_member if user_id != member_id]
+        elif assigned_member == member_id:
+            properties[assignee_property_id] = ""
         else:
-            if assigned_member == member_id:
-                properties["axkhqa4jxr3jcqe4k87g8bhmary"] = ""
-
-                url = f"https://mattermost.portabo.cz/plugins/focalboard/api/v2/boards/{board_id}/blocks/{task_id}"
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                    "X-Requested-With": "XMLHttpRequest"
-                }
-                data = {
-                    "updatedFields":
-                    {
-                        "properties":properties,
-                        "contentOrder":[]
-                    },
-                    "deletedFields":[]
-                }
-                requests.patch(url, json=data, headers=headers)
-            
+            continue
+
+        block_ids.append(card["id"])
+        block_patches.append({
+            "updatedFields":
+            {
+                "properties":properties,
+                "contentOrder":[]
+            },
+            "deletedFields":[]
+        })
+
+    batch_size = settings.mattermost_batch_size
+    for i in range(0, len(block_ids), batch_size):
+        batch_ids = block_ids[i:i + batch_size]
+        batch_patches = block_patches[i:i + batch_size]
+        response = patch_tasks(token, board_id, batch_ids, batch_patches)
+        if response.ok:
+            result["unassigned_tasks"].extend(batch_ids)
+            continue
+
+        # The batch endpoint is all-or-nothing, so retry its cards one by
+        # one to find out which of them actually failed.
+        responses = patch_tasks_each(token, board_id, batch_ids, batch_patches)
+        for task_id, response in zip(batch_ids, responses):
+            if response.ok:
+                result["unassigned_tasks"].append(task_id)
             else:
-                continue
-    return None
+                result["failed_tasks"].append({"id": task_id, "status_code": response.status_code})
+
+    return result
@@ -0,0 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from core.config import get_settings
+from . import api_calls
+
+
+settings = get_settings()
+
+# Sized like the connection pool so fan-out never waits on a free connection.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.mattermost_pool_maxsize,
+    thread_name_prefix="focalboard"
+)
+
+
+class AsyncFocalboardClient:
+    def __init__(self, token, limit=None):
+        self.token = token
+        self.semaphore = asyncio.Semaphore(limit or settings.mattermost_fanout_limit)
+
+    async def call(self, func, *args, **kwargs):
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, lambda: func(self.token, *args, **kwargs))
+
+    async def gather(self, func, items):
+        return await asyncio.gather(*(self.call(func, item) for item in items))
+
+    async def get_board(self, board_id):
+        return await self.call(api_calls.get_board, board_id)
+
+    async def get_cards(self, board_id):
+        return await self.call(api_calls.get_cards, board_id)
+
+    async def get_blocks(self, board_id):
+        return await self.call(api_calls.get_blocks, board_id)
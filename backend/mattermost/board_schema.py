@@ -0,0 +1,20 @@
+from core.cache import TTLCache
+from core.config import get_settings
+
+
+settings = get_settings()
+
+
+class BoardSchema:
+    """Property ids by name. Option lists change too often to be cached and
+    are read from the board itself, see api_calls.get_board_options."""
+
+    def __init__(self, board_id, card_properties):
+        self.board_id = board_id
+        self.property_ids = {prop["name"]: prop["id"] for prop in card_properties}
+
+    def property_id(self, name):
+        return self.property_ids.get(name)
+
+
+board_schemas = TTLCache(settings.mattermost_schema_cache_size, settings.mattermost_schema_cache_ttl)
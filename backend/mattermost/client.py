@@ -0,0 +1,226 @@
+from fastapi import HTTPException
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import random
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+from core.config import get_settings
+
+
+settings = get_settings()
+
+MATTERMOST_API = "/api/v4"
+FOCALBOARD_API = "/plugins/focalboard/api/v2"
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class ClientMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive upstream failures and lets a single
+    probe through once `reset_after` seconds have passed."""
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def release(self):
+        """Reopens a breaker left half open by a probe that neither succeeded nor failed."""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    metrics.increment("breaker_opened")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+metrics = ClientMetrics()
+breaker = CircuitBreaker(settings.mattermost_breaker_threshold, settings.mattermost_breaker_reset)
+
+
+def get_metrics():
+    return {**metrics.snapshot(), "breaker_state": breaker.state}
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # Shared by every user, so it must not remember anyone's login cookies.
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(
+                    pool_connections=settings.mattermost_pool_connections,
+                    pool_maxsize=settings.mattermost_pool_maxsize,
+                    pool_block=settings.mattermost_pool_block
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def build_url(path):
+    return settings.mattermost_url.rstrip("/") + path
+
+
+def build_headers(token=None):
+    headers = {
+        "Content-Type": "application/json",
+        "X-Requested-With": "XMLHttpRequest"
+    }
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def backoff_delay(attempt):
+    # Full jitter keeps retrying workers from hitting the upstream in lockstep.
+    return random.uniform(0, min(settings.mattermost_backoff_max, settings.mattermost_backoff_base * 2 ** attempt))
+
+
+def retry_after_delay(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def request(method, path, token=None, headers=None, **kwargs):
+    request_headers = build_headers(token)
+    if headers:
+        request_headers.update(headers)
+    kwargs.setdefault("timeout", (settings.mattermost_connect_timeout, settings.mattermost_read_timeout))
+
+    retries = settings.mattermost_max_retries if method in IDEMPOTENT_METHODS else 0
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            metrics.increment("short_circuited")
+            raise HTTPException(status_code=503, detail="Mattermost is unavailable")
+
+        metrics.increment("requests")
+        try:
+            response = get_session().request(method, build_url(path), headers=request_headers, **kwargs)
+        except requests.Timeout:
+            metrics.increment("timeouts")
+            breaker.record_failure()
+            if attempt >= retries:
+                raise HTTPException(status_code=504, detail="Mattermost did not respond in time")
+        except requests.ConnectionError:
+            metrics.increment("connection_errors")
+            breaker.record_failure()
+            if attempt >= retries:
+                raise HTTPException(status_code=502, detail="Could not reach Mattermost")
+        else:
+            if response.status_code == 429:
+                # A throttled request was never processed, so any method may be retried.
+                metrics.increment("rate_limited")
+                # Mattermost answered, so a throttled probe still proves it is up.
+                breaker.record_success()
+                delay = retry_after_delay(response)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                if attempt >= settings.mattermost_max_retries or delay > settings.mattermost_backoff_max:
+                    return response
+                metrics.increment("retries")
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                metrics.increment("server_errors")
+                breaker.record_failure()
+                if attempt >= retries:
+                    return response
+            else:
+                breaker.record_success()
+                return response
+        finally:
+            breaker.release()
+
+        metrics.increment("retries")
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+def get(token, path, **kwargs):
+    return request("GET", path, token, **kwargs)
+
+
+def post(token, path, **kwargs):
+    return request("POST", path, token, **kwargs)
+
+
+def patch(token, path, **kwargs):
+    return request("PATCH", path, token, **kwargs)
+
+
+def delete(token, path, **kwargs):
+    return request("DELETE", path, token, **kwargs)
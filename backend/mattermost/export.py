@@ -0,0 +1,169 @@
+from fastapi import HTTPException
+from datetime import datetime, timezone
+from core.config import get_settings
+from .async_client import AsyncFocalboardClient
+from . import api_calls
+from . import services
+import asyncio
+
+
+settings = get_settings()
+
+
+def normalize_date_to_utc(date):
+    if date is None:
+        return None
+    utc_date = datetime(date.year, date.month, date.day, tzinfo=timezone.utc)
+    return int(utc_date.timestamp() * 1000)
+
+
+def parse_local_date(value):
+    return normalize_date_to_utc(datetime.strptime(value, "%Y-%m-%d"))
+
+
+class ExportPlan:
+    """Everything the target board needs, worked out before any call is made."""
+
+    def __init__(self, data, tasks):
+        self.title = data["title"]
+        self.description = data["description"]
+        self.status_options = []
+        column_ids = {}
+        for column in data["columns"]:
+            option = {"id": api_calls.generate_id(), "value": column["title"], "color": "propColorDefault"}
+            self.status_options.append(option)
+            column_ids[column["id"]] = option["id"]
+
+        self.tasks = []
+        for task in tasks:
+            column_id = column_ids.get(task["column_id"])
+            if not column_id:
+                continue
+            self.tasks.append({
+                "key": task["id"],
+                "title": task["title"],
+                "column_id": column_id,
+                "description": task["description"],
+                "start_date": parse_local_date(task["start_date"]),
+                "end_date": parse_local_date(task["end_date"]),
+                "parent_ids": task.get("parent_ids", [])
+            })
+
+        planned = {task["key"] for task in self.tasks}
+        for task in self.tasks:
+            task["depends_on"] = [parent_id for parent_id in task.pop("parent_ids") if parent_id in planned]
+
+    def card_properties(self, status_property_id):
+        return [
+            {"id": status_property_id, "name": "Status", "type": "select", "options": self.status_options},
+            {"id": api_calls.generate_id(), "name": "Start Date", "type": "date", "options": []},
+            {"id": api_calls.generate_id(), "name": "End Date", "type": "date", "options": []},
+            {"id": api_calls.generate_id(), "name": "Description", "type": "text", "options": []},
+            {"id": api_calls.generate_id(), "name": "Depends on", "type": "multiSelect", "options": []}
+        ]
+
+
+class BoardExporter:
+    """Runs an ExportPlan in phases: schema, cards, then order, options and dependencies.
+
+    Calls inside a phase are independent and run concurrently; every phase
+    reports its progress through on_progress(phase, done, total).
+    """
+
+    def __init__(self, token, team_id, on_progress=None):
+        self.token = token
+        self.team_id = team_id
+        self.on_progress = on_progress
+        self.progress = {}
+        self.focalboard = AsyncFocalboardClient(token)
+
+    def report(self, phase, done, total):
+        self.progress[phase] = {"done": done, "total": total}
+        if self.on_progress:
+            self.on_progress(phase, done, total)
+
+    async def run_phase(self, phase, calls):
+        total = len(calls)
+        done = 0
+        self.report(phase, done, total)
+
+        async def run(call):
+            nonlocal done
+            func, *args = call
+            response = await self.focalboard.call(func, *args)
+            if not response.ok:
+                raise HTTPException(status_code=response.status_code, detail=f"Export failed during {phase}")
+            done += 1
+            self.report(phase, done, total)
+            return response
+
+        return await asyncio.gather(*(run(call) for call in calls))
+
+    async def run(self, plan):
+        board_response, = await self.run_phase("board", [(api_calls.create_board, self.team_id)])
+        created = board_response.json()
+        board = created["boards"][0]
+        board_id = board["id"]
+        status_property_id = next(prop["id"] for prop in board["cardProperties"] if prop["name"] == "Status")
+        tracker_view = services.get_progress_tracker(created.get("blocks", []))
+        if tracker_view is None:
+            blocks_response = await self.focalboard.get_blocks(board_id)
+            if blocks_response.ok:
+                tracker_view = services.get_progress_tracker(blocks_response.json())
+
+        await self.run_phase("schema", [(
+            api_calls.patch_board_schema,
+            board_id,
+            plan.card_properties(status_property_id),
+            plan.title,
+            plan.description
+        )])
+        schema = await self.focalboard.call(api_calls.get_board_schema, board_id)
+
+        batches = list(services.chunked(plan.tasks, settings.mattermost_batch_size))
+        card_calls = []
+        for batch in batches:
+            blocks = [
+                api_calls.build_card_block(board_id, task["title"], services.build_card_properties(schema, task, []))
+                for task in batch
+            ]
+            card_calls.append((api_calls.create_tasks, board_id, blocks))
+        responses = await self.run_phase("cards", card_calls)
+
+        key_to_id = {}
+        created_cards = []
+        for batch, response in zip(batches, responses):
+            for task, block in zip(batch, response.json()):
+                key_to_id[task["key"]] = block["id"]
+                created_cards.append(block)
+
+        link_calls = [(api_calls.set_depends_on_options, board_id, created_cards)]
+        if tracker_view:
+            card_order = [key_to_id[task["key"]] for task in plan.tasks]
+            link_calls.append((api_calls.set_card_order, board_id, tracker_view["id"], card_order))
+
+        dependent_tasks = [task for task in plan.tasks if task["depends_on"]]
+        for batch in services.chunked(dependent_tasks, settings.mattermost_batch_size):
+            block_ids = [key_to_id[task["key"]] for task in batch]
+            block_patches = [
+                {
+                    "updatedFields": {
+                        "properties": services.build_card_properties(
+                            schema, task, [key_to_id[key] for key in task["depends_on"]]
+                        )
+                    },
+                    "deletedFields": []
+                }
+                for task in batch
+            ]
+            link_calls.append((api_calls.patch_tasks, board_id, block_ids, block_patches))
+        await self.run_phase("dependencies", link_calls)
+
+        return board_id
+
+
+def export_board(token, team_id, data, tasks, on_progress=None):
+    plan = ExportPlan(data, tasks)
+    exporter = BoardExporter(token, team_id, on_progress)
+    board_id = asyncio.run(exporter.run(plan))
+    return board_id, exporter.progress
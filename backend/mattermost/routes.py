@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Request, Body, Query, Response, Depends, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
@@ -9,12 +9,14 @@ import auth.models
 import auth.utils
 from core.database import get_db
 from . import api_calls
+from . import client
 from . import schemas
 from . import services
-from . import cpm
-import pandas as pd
-import networkx as nx
-from networkx.readwrite import json_graph
+from . import export
+from .snapshot import load_board_snapshot
+from scheduling.export import ExportFormat, MEDIA_TYPES, stream_rows
+from scheduling.gantt import GanttFormat, gantt_viewport
+import json
 
 
 router = APIRouter()
@@ -47,6 +49,11 @@ def get_matt_token(
         return response
 
 
+@router.get("/client_metrics/")
+def get_client_metrics(user: auth.models.User = Depends(auth.utils.get_current_user)):
+    return client.get_metrics()
+
+
 @router.get("/user/")
 def get_matt_user(request: Request):
     token = request.cookies.get("mattermost_token")
@@ -198,8 +205,7 @@ def get_matt_boards_with_access(request: Request, team_id: str):
         raise HTTPException(status_code=boards_response.status_code, detail="Failed to fetch boards")
     
     boards = boards_response.json()
-    boards_with_access = services.get_boards_with_access(token, boards)
-    valid_boards = services.get_valid_boards(token, boards_with_access)
+    valid_boards = services.get_accessible_valid_boards(token, boards)
 
     return valid_boards
 
@@ -210,16 +216,8 @@ def get_matt_columns_with_tasks(request: Request, board_id: str, team_id: str):
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
-    board = api_calls.get_board(token, board_id).json()
-    cards = api_calls.get_cards(token, board_id).json()
-    tasks = services.map_card(board, cards, token, team_id)
-
-    board_response = api_calls.get_board(token, board_id)
-    board = board_response.json()
-
-    result = services.get_columns_with_tasks(token, board, board_id, tasks)
-
-    return result
+    snapshot = load_board_snapshot(token, board_id, team_id)
+    return snapshot.columns
 
 
 @router.post("/board/columns/")
@@ -228,8 +226,7 @@ def create_matt_column(request: Request, board_id: str, new_column: str):
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
-    board = api_calls.get_board(token, board_id).json()
-    columns = next((prop["options"] for prop in board["cardProperties"] if prop.get("name") == "Status"),[])
+    columns = api_calls.get_board_options(token, board_id, "Status")
 
     response = api_calls.create_column(token, board_id, columns, new_column).json()
     return response
@@ -241,8 +238,7 @@ def patch_matt_column(request: Request, board_id: str, column_id: str, new_name:
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
-    board = api_calls.get_board(token, board_id).json()
-    columns = next((prop["options"] for prop in board["cardProperties"] if prop.get("name") == "Status"),[])
+    columns = api_calls.get_board_options(token, board_id, "Status")
 
     response = api_calls.rename_column(token, board_id, column_id, columns, new_name).json()
     return response
@@ -254,8 +250,7 @@ def delete_matt_column(request: Request, board_id: str, column_id: str):
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
-    board = api_calls.get_board(token, board_id).json()
-    columns = next((prop["options"] for prop in board["cardProperties"] if prop.get("name") == "Status"),[])
+    columns = api_calls.get_board_options(token, board_id, "Status")
 
     response = api_calls.delete_column(token, board_id, column_id, columns).json()
     return response
@@ -278,12 +273,7 @@ def create_matt_tasks(
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
-    board = api_calls.get_board(token, board_id).json()
-    card_properties = board["cardProperties"]
-    for property in card_properties:
-        if property["name"] == "Description":
-            description_property_id = property["id"]
-            break
+    description_property_id = api_calls.get_board_schema(token, board_id).property_id("Description")
     
     response = api_calls.create_task(token, board_id, column_id, title, description_property_id, description).json()
     
@@ -308,16 +298,12 @@ def delete_matt_tasks(request: Request, board_id: str, task_id: str):
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
-    board = api_calls.get_board(token, board_id).json()
-    properties = board["cardProperties"]
-    for property in properties:
-        if property["name"] == "Depends on":
-            options = property["options"]
-            for i, option in enumerate(options):
-                if option["id"] == task_id:
-                    del options[i]
-                    api_calls.change_depends_on_option(token, board_id, options)
-                    break
+    options = api_calls.get_board_options(token, board_id, "Depends on")
+    for i, option in enumerate(options):
+        if option["id"] == task_id:
+            del options[i]
+            api_calls.change_depends_on_option(token, board_id, options)
+            break
     
     response = api_calls.delete_task(token, board_id, task_id).json()
     return response
@@ -331,16 +317,12 @@ def rename_matt_tasks(request: Request, board_id: str, task_id: str, new_title:
     
     response = api_calls.rename_task(token, board_id, task_id, new_title).json()
 
-    board = api_calls.get_board(token, board_id).json()
-    properties = board["cardProperties"]
-    for property in properties:
-        if property["name"] == "Depends on":
-            options = property["options"]
-            for option in options:
-                if option["id"] == task_id:
-                    option["value"] = new_title
-                    api_calls.change_depends_on_option(token, board_id, options)
-                    break
+    options = api_calls.get_board_options(token, board_id, "Depends on")
+    for option in options:
+        if option["id"] == task_id:
+            option["value"] = new_title
+            api_calls.change_depends_on_option(token, board_id, options)
+            break
     
     return response
 
@@ -392,55 +374,66 @@ def get_block_id(request: Request, board_id: str):
 
 
 @router.post("/gantt/early/")
-def gantt_early_view(request: Request, board_id: str, team_id: str):
+def gantt_early_view(
+        request: Request,
+        board_id: str,
+        team_id: str,
+        format: GanttFormat = "columnar",
+        viewport: Optional[dict] = Depends(gantt_viewport)
+    ):
     token = request.cookies.get("mattermost_token")
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
 
-    board = api_calls.get_board(token, board_id).json()
-    cards = api_calls.get_cards(token, board_id).json()
-    tasks = services.map_card(board, cards, token, team_id)
-    board_response = api_calls.get_board(token, board_id)
-    board = board_response.json()
-    project_data = services.get_columns_with_tasks(token, board, board_id, tasks)
-    for board in project_data:
-        for task in board["tasks"]:
-            if task.get("Depends_on") == [None]:
-                task["Depends_on"] = []
-
-    tasks, _, _ = cpm.calculate_critical_path(project_data)
-    fig = services.build_gantt_chart(
-        tasks,
-        start_field="early_start_date",
-        end_field="early_finish_date"
-    )
-    return Response(content=fig.to_json(), media_type="application/json")
+    snapshot = load_board_snapshot(token, board_id, team_id)
+    if format == "plotly":
+        fig = snapshot.gantt_chart("early_start_date", "early_finish_date")
+        return Response(content=fig.to_json(), media_type="application/json")
+    index = snapshot.gantt_index("early_start_date", "early_finish_date")
+    return JSONResponse(content=index.query(**viewport) if viewport else index.payload)
 
 
 @router.post("/gantt/late/")
-def gantt_late_view(request: Request, board_id: str, team_id: str):
+def gantt_late_view(
+        request: Request,
+        board_id: str,
+        team_id: str,
+        format: GanttFormat = "columnar",
+        viewport: Optional[dict] = Depends(gantt_viewport)
+    ):
     token = request.cookies.get("mattermost_token")
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
 
-    board = api_calls.get_board(token, board_id).json()
-    cards = api_calls.get_cards(token, board_id).json()
-    tasks = services.map_card(board, cards, token, team_id)
-    board_response = api_calls.get_board(token, board_id)
-    board = board_response.json()
-    project_data = services.get_columns_with_tasks(token, board, board_id, tasks)
-    for board in project_data:
-        for task in board["tasks"]:
-            if task.get("Depends_on") == [None]:
-                task["Depends_on"] = []
+    snapshot = load_board_snapshot(token, board_id, team_id)
+    if format == "plotly":
+        fig = snapshot.gantt_chart("late_start_date", "late_finish_date")
+        return Response(content=fig.to_json(), media_type="application/json")
+    index = snapshot.gantt_index("late_start_date", "late_finish_date")
+    return JSONResponse(content=index.query(**viewport) if viewport else index.payload)
 
-    tasks, _, _ = cpm.calculate_critical_path(project_data)
-    fig = services.build_gantt_chart(
-        tasks,
-        start_field="late_start_date",
-        end_field="late_finish_date"
-    )
-    return Response(content=fig.to_json(), media_type="application/json")
+
+@router.post("/gantt/leveled/")
+def gantt_leveled_view(
+        request: Request,
+        board_id: str,
+        team_id: str,
+        capacity: int = 1,
+        format: GanttFormat = "columnar",
+        viewport: Optional[dict] = Depends(gantt_viewport)
+    ):
+    token = request.cookies.get("mattermost_token")
+    if not token:
+        raise HTTPException(status_code=401, detail="No Mattermost token")
+    if capacity < 1:
+        raise HTTPException(status_code=400, detail="capacity must be at least 1")
+
+    snapshot = load_board_snapshot(token, board_id, team_id)
+    if format == "plotly":
+        fig = snapshot.leveled_gantt_chart(capacity)
+        return Response(content=fig.to_json(), media_type="application/json")
+    index = snapshot.leveled_gantt_index(capacity)
+    return JSONResponse(content=index.query(**viewport) if viewport else index.payload)
 
 
 @router.get("/cpm_graph/")
@@ -449,30 +442,48 @@ def get_cpm_graph(request: Request, board_id: str, team_id: str):
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
-    board = api_calls.get_board(token, board_id).json()
-    cards = api_calls.get_cards(token, board_id).json()
-    tasks = services.map_card(board, cards, token, team_id)
-    board_response = api_calls.get_board(token, board_id)
-    board = board_response.json()
-    project_data = services.get_columns_with_tasks(token, board, board_id, tasks)
-    for board in project_data:
-        for task in board["tasks"]:
-            if task.get("Depends_on") == [None]:
-                task["Depends_on"] = []
+    snapshot = load_board_snapshot(token, board_id, team_id)
+    return JSONResponse(content=snapshot.cpm_graph())
 
-    task_map, graph_map, critical_tasks = cpm.calculate_critical_path(project_data)
-    G = nx.DiGraph()
 
-    for tid, task in task_map.items():
-        G.add_node(tid, label=task["title"], color="red" if tid in critical_tasks else "gray")
-    
-    for source, targets in graph_map.items():
-        for target in targets:
-            is_critical = source in critical_tasks and target in critical_tasks
-            G.add_edge(source, target, color="red" if is_critical else "gray")
-    
-    data = json_graph.node_link_data(G)
-    return JSONResponse(content=data)
+@router.get("/board/schedule/export/")
+def export_matt_board_schedule(request: Request, board_id: str, team_id: str, format: ExportFormat = "csv"):
+    token = request.cookies.get("mattermost_token")
+    if not token:
+        raise HTTPException(status_code=401, detail="No Mattermost token")
+
+    snapshot = load_board_snapshot(token, board_id, team_id)
+    # Surface a dependency cycle as a 400 before the response has started.
+    snapshot.critical_path()
+    return StreamingResponse(
+        stream_rows(snapshot.export_rows(), format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="board-{board_id}-schedule.{format}"'}
+    )
+
+
+@router.get("/board/schedule/")
+def get_matt_board_schedule(request: Request, board_id: str, team_id: str, format: GanttFormat = "columnar"):
+    token = request.cookies.get("mattermost_token")
+    if not token:
+        raise HTTPException(status_code=401, detail="No Mattermost token")
+
+    snapshot = load_board_snapshot(token, board_id, team_id)
+    columns = json.dumps(snapshot.columns)
+    if format == "plotly":
+        gantt_early = snapshot.gantt_chart("early_start_date", "early_finish_date").to_json()
+        gantt_late = snapshot.gantt_chart("late_start_date", "late_finish_date").to_json()
+    else:
+        gantt_early = json.dumps(snapshot.gantt_columns("early_start_date", "early_finish_date"))
+        gantt_late = json.dumps(snapshot.gantt_columns("late_start_date", "late_finish_date"))
+    cpm_graph = json.dumps(snapshot.cpm_graph())
+
+    # Parts are serialized on their own (plotly does its own encoding), so splice them in.
+    content = (
+        f'{{"columns":{columns},"gantt_early":{gantt_early},'
+        f'"gantt_late":{gantt_late},"cpm_graph":{cpm_graph}}}'
+    )
+    return Response(content=content, media_type="application/json")
 
 
 def normalize_title(title: str) -> str:
@@ -480,7 +491,7 @@ def normalize_title(title: str) -> str:
 
 
 @router.post("/import_csv/")
-async def import_csv_project(
+def import_csv_project(
     request: Request,
     team_id: str,
     title: str,
@@ -499,45 +510,35 @@ async def import_csv_project(
     api_calls.add_description_property(token, board_id)
     api_calls.add_depends_on_property(token, board_id)
 
-    board = api_calls.get_board(token, board_id).json()
-    props = board["cardProperties"]
-    for prop in props:
-        if prop["name"] == "Status":
-            column_id = prop["options"][0]["id"]
-            break
+    column_id = api_calls.get_board_options(token, board_id, "Status")[0]["id"]
 
-    blocks = api_calls.get_blocks(token, board_id).json()
-    block_id = next(block["id"] for block in blocks if block["type"] == "view" and block["title"] == "Progress Tracker")
+    contents = csv_file.file.read()
+    import pandas as pd
 
-    contents = await csv_file.read()
     df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
+    rows = df.to_dict("records")
+    titles = [str(row["Title"]) for row in rows]
 
-    title_to_id = {}
-
-    for _, row in df.iterrows():
+    tasks = []
+    for index, row in enumerate(rows):
         start_date = int(datetime.strptime(row["Start Date"], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
         end_date = int(datetime.strptime(row["End Date"], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
 
-        depends_ids = []
+        # A row may only depend on rows listed above it, as before.
         depends_str = row["Depends on"] if not pd.isna(row["Depends on"]) else ""
-        for other_title in df["Title"]:
-            if str(other_title) in depends_str and other_title in title_to_id:
-                depends_ids.append(title_to_id[other_title])
-
-        response = create_matt_tasks(
-            request=request,
-            board_id=board_id,
-            block_id=block_id,
-            column_id=column_id,
-            title=row["Title"],
-            description=row["Description"],
-            start_date=start_date,
-            end_date=end_date,
-            depends_on=depends_ids,
-        )
-
-        for task in response:
-            title_to_id[row["Title"]] = task["id"]
+        depends_on = [other for other in range(index) if titles[other] in depends_str]
+
+        tasks.append({
+            "key": index,
+            "title": row["Title"],
+            "column_id": column_id,
+            "description": row["Description"] if not pd.isna(row["Description"]) else "",
+            "start_date": start_date,
+            "end_date": end_date,
+            "depends_on": depends_on
+        })
+
+    services.bulk_create_tasks(token, board_id, tasks)
 
     return {"message": "Board and tasks created successfully", "board_id": board_id}
 
@@ -583,17 +584,8 @@ def remove_matt_member_from_board(request: Request, board_id: str, member_id: st
         raise HTTPException(status_code=401, detail="No Mattermost token")
     
     response = api_calls.remove_member_from_board(token, board_id, member_id).json()
-    api_calls.remove_member_from_all_task(token, board_id, member_id)
-    return response
-
-
-from datetime import datetime, timezone
-
-def normalize_date_to_utc(date):
-    if date is None:
-        return None
-    utc_date = datetime(date.year, date.month, date.day, tzinfo=timezone.utc)
-    return int(utc_date.timestamp() * 1000)
+    result = api_calls.remove_member_from_all_task(token, board_id, member_id)
+    return {"member": response, **result}
 
 
 @router.post("/export_from_local/")
@@ -607,88 +599,5 @@ def export_board_to_mattermost(
     if not token:
         raise HTTPException(status_code=401, detail="No Mattermost token")
 
-    new_board = create_matt_board(request, team_id, data["title"], data["description"])
-    board_id = new_board["boards"][0]["id"]
-
-    # Удаляем колонку "Status"
-    properties = new_board["boards"][0]["cardProperties"]
-    for property in properties:
-        if property["name"] == "Status":
-            for option in property["options"]:
-                delete_matt_column(request, board_id, option["id"])
-
-    block_id = get_block_id(request, board_id)
-
-    # Создаём колонки
-    for column in data["columns"]:
-        create_matt_column(request, board_id, column["title"])
-
-    created_columns = get_matt_columns_with_tasks(request, board_id, team_id)
-    title_to_column_id = {col["title"]: col["id"] for col in created_columns}
-
-    # Создаём мапу old_id -> task
-    task_map = {task["id"]: task for task in tasks}
-    old_to_new_task_id = {}
-
-    # Шаг 1: создаём задачи без зависимостей
-    for task in tasks:
-        column_title = next((col["title"] for col in data["columns"] if col["id"] == task["column_id"]), None)
-        column_id = title_to_column_id.get(column_title)
-        if not column_id:
-            continue
-
-        start_date_dt = datetime.strptime(task["start_date"], "%Y-%m-%d")
-        end_date_dt = datetime.strptime(task["end_date"], "%Y-%m-%d")
-        start_date_unix = normalize_date_to_utc(start_date_dt)
-        end_date_unix = normalize_date_to_utc(end_date_dt)
-
-        created_task = create_matt_tasks(
-            request=request,
-            board_id=board_id,
-            block_id=block_id,
-            column_id=column_id,
-            title=task["title"],
-            description=task["description"],
-            start_date=start_date_unix,
-            end_date=end_date_unix,
-            depends_on=[],  # пока нет связей
-            assignee_id=None
-        )
-
-        if isinstance(created_task, list) and created_task:
-            new_task_id = created_task[0]["id"]
-        else:
-            raise Exception(f"Unexpected task creation format: {created_task}")
-
-        old_to_new_task_id[task["id"]] = new_task_id
-
-    # Шаг 2: обновляем задачи, проставляя depends_on
-    for task in tasks:
-        old_id = task["id"]
-        new_id = old_to_new_task_id.get(old_id)
-        if not new_id:
-            continue
-
-        column_title = next((col["title"] for col in data["columns"] if col["id"] == task["column_id"]), None)
-        column_id = title_to_column_id.get(column_title)
-        if not column_id:
-            continue
-
-        start_date_unix = normalize_date_to_utc(datetime.strptime(task["start_date"], "%Y-%m-%d"))
-        end_date_unix = normalize_date_to_utc(datetime.strptime(task["end_date"], "%Y-%m-%d"))
-
-        depends_on = [old_to_new_task_id[parent_id] for parent_id in task.get("parent_ids", []) if parent_id in old_to_new_task_id]
-
-        patch_matt_task(
-            request=request,
-            board_id=board_id,
-            column_id=column_id,
-            task_id=new_id,
-            description=task["description"],
-            start_date=start_date_unix,
-            end_date=end_date_unix,
-            depends_on=depends_on,
-            assignee_id=None
-        )
-
-    return {"status": "ok", "board_id": board_id}
+    board_id, progress = export.export_board(token, team_id, data, tasks)
+    return {"status": "ok", "board_id": board_id, "progress": progress}
@@ -1,35 +1,44 @@
 from fastapi import HTTPException
 from datetime import datetime
+from core.config import get_settings
+from core.cache import TTLCache
+from scheduling.records import DAY_MS, TaskRecord, link
 from . import api_calls
+from .async_client import AsyncFocalboardClient
+import asyncio
 import json
-import pandas as pd
-import plotly.express as px
 
 
-def get_boards_with_access(token, boards):
-    boards_with_access = []
-    
-    for board in boards:
-        board_id = board.get("id")
-        response = api_calls.get_cards(token, board_id)
-        if response.ok:
-            boards_with_access.append(board)
-    
-    return boards_with_access
+settings = get_settings()
 
+# (team_id, user_id) -> username, shared by every board of the team.
+user_directory = TTLCache(settings.mattermost_user_cache_size, settings.mattermost_user_cache_ttl)
 
-def get_valid_boards(token, boards):
-    valid_boards = []
 
-    for board in boards:
+def is_valid_board(blocks):
+    for block in blocks:
+        if block["type"] == "view" and block["parentId"] == settings.mattermost_template_board_id:
+            return True
+    return False
+
+
+async def fetch_accessible_valid_boards(focalboard, boards):
+    async def check_board(board):
         board_id = board.get("id")
-        blocks = api_calls.get_blocks(token, board_id).json()
-        for block in blocks:
-            if block["type"] == "view" and block["parentId"] == "bbzj7aho8dtrx8emw8p4arkj1bw":
-                valid_boards.append(board)
-                break
-    
-    return valid_boards
+        cards_response = await focalboard.get_cards(board_id)
+        if not cards_response.ok:
+            return None
+        blocks_response = await focalboard.get_blocks(board_id)
+        if blocks_response.ok and is_valid_board(blocks_response.json()):
+            return board
+        return None
+
+    checked = await asyncio.gather(*(check_board(board) for board in boards))
+    return [board for board in checked if board is not None]
+
+
+def get_accessible_valid_boards(token, boards):
+    return asyncio.run(fetch_accessible_valid_boards(AsyncFocalboardClient(token), boards))
 
 
 def is_valid_timestamp(value):
@@ -42,7 +51,7 @@ def is_valid_timestamp(value):
         return False
 
 
-def parse_date(value):
+def parse_timestamp(value):
     try:
         if isinstance(value, str) and value.startswith("{"):
             value = json.loads(value)
@@ -51,15 +60,45 @@ def parse_date(value):
             timestamp = value
 
         if is_valid_timestamp(timestamp):
-            return datetime.utcfromtimestamp(int(timestamp) / 1000).strftime('%Y-%m-%d')
+            return int(timestamp)
     except Exception:
         pass
     return None
 
 
-def map_card(board_json, cards_json, token, team_id):
+def format_date(timestamp):
+    return datetime.utcfromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
+
+
+def resolve_usernames(token, team_id, user_ids):
+    usernames = {}
+    missing = []
+    for user_id in set(user_ids):
+        username = user_directory.get((team_id, user_id))
+        if username is None:
+            missing.append(user_id)
+        else:
+            usernames[user_id] = username
+
+    if missing:
+        response = api_calls.get_board_members_usernames(token, team_id, missing).json()
+        if isinstance(response, list):
+            for user in response:
+                user_id = user.get("id")
+                username = user.get("username")
+                if user_id and username:
+                    user_directory.set((team_id, user_id), username)
+                    usernames[user_id] = username
+
+    return usernames
+
+
+def map_card(board_json, cards_json, token, team_id, days=None):
+    """Cards as task dicts. When `days` is given it is filled with
+    card id -> (start, end) in epoch days for the scheduling records."""
     board_props = {prop["id"]: prop for prop in board_json["cardProperties"]}
     mapped_cards = []
+    assignees = []
 
     for card in cards_json:
         new_card = {
@@ -73,6 +112,7 @@ def map_card(board_json, cards_json, token, team_id):
             "Assignee_Username": None,
             "Assignee_ID": None
         }
+        start = end = None
 
         for prop_id, raw_value in card.get("properties", {}).items():
             prop_def = board_props.get(prop_id)
@@ -86,30 +126,46 @@ def map_card(board_json, cards_json, token, team_id):
             elif name == "Description":
                 new_card["Description"] = raw_value
             elif name == "Start Date":
-                new_card["Start_Date"] = parse_date(raw_value)
+                start = parse_timestamp(raw_value)
             elif name == "End Date":
-                new_card["End_Date"] = parse_date(raw_value)
+                end = parse_timestamp(raw_value)
             elif name == "Depends on":
-                new_card["Depends_on"] = raw_value if isinstance(raw_value, list) else [raw_value]
+                if isinstance(raw_value, list):
+                    new_card["Depends_on"] = raw_value
+                elif raw_value:
+                    new_card["Depends_on"] = [raw_value]
             elif name == "Assignee":
-                if raw_value == "":
-                    pass
-                else:
-                    id_list = [raw_value]
-                    response = api_calls.get_board_members_usernames(token, team_id, id_list).json()
-                    
-                    if isinstance(response, list) and response:
-                        new_card["Assignee_Username"] = response[0].get("username")
-                        new_card["Assignee_ID"] = raw_value
-                    else:
-                        pass
+                # A multi-person property holds a list; the card shows its first person.
+                if isinstance(raw_value, list):
+                    raw_value = next((user_id for user_id in raw_value if user_id), None)
+                if raw_value:
+                    assignees.append((new_card, raw_value))
 
+        if start is not None:
+            new_card["Start_Date"] = format_date(start)
+        if end is not None:
+            new_card["End_Date"] = format_date(end)
+        if days is not None and start is not None and end is not None:
+            days[card["id"]] = (start // DAY_MS, end // DAY_MS)
         mapped_cards.append(new_card)
+
+    if assignees:
+        usernames = resolve_usernames(token, team_id, [user_id for _, user_id in assignees])
+        for new_card, user_id in assignees:
+            username = usernames.get(user_id)
+            if username:
+                new_card["Assignee_Username"] = username
+                new_card["Assignee_ID"] = user_id
+
     return mapped_cards
 
 
+def get_progress_tracker(blocks):
+    return next((item for item in blocks if item.get("title") == "Progress Tracker"), None)
+
+
 def get_cards_position(blocks):
-    tracker_view = next((item for item in blocks if item.get("title") == "Progress Tracker"), None)
+    tracker_view = get_progress_tracker(blocks)
     if not tracker_view:
         return {}
     
@@ -119,7 +175,7 @@ def get_cards_position(blocks):
     return result
 
 
-def get_columns_with_tasks(token, board, board_id, tasks):
+def get_columns_with_tasks(board, tasks, blocks):
     status_prop = next(
         (prop for prop in board.get("cardProperties", []) if prop.get("name") == "Status"), 
         None
@@ -127,7 +183,11 @@ def get_columns_with_tasks(token, board, board_id, tasks):
 
     if not status_prop or "options" not in status_prop:
         raise HTTPException(status_code=404, detail="Status column not found in board properties")
-    
+
+    tasks_by_status = {}
+    for task in tasks:
+        tasks_by_status.setdefault(task.get("Status"), []).append(task)
+
     result = []
     for option in status_prop["options"]:
         status_id = option["id"]
@@ -135,11 +195,10 @@ def get_columns_with_tasks(token, board, board_id, tasks):
             "board_id": board.get("id"),
             "id": status_id,
             "title": option.get("value"),
-            "tasks": [task for task in tasks if task.get("Status") == status_id]
+            "tasks": tasks_by_status.get(status_id, [])
         }
         result.append(column)
     
-    blocks = api_calls.get_blocks(token, board_id).json()
     cards_position = get_cards_position(blocks)
 
     for column in result:
@@ -151,7 +210,96 @@ def get_columns_with_tasks(token, board, board_id, tasks):
     return result
 
 
+def get_task_records(columns, days):
+    """TaskRecords for the dated cards of `columns`, in column order."""
+    records = []
+    parent_ids = []
+    for column in columns:
+        for task in column["tasks"]:
+            span = days.get(task["id"])
+            if span is None:
+                continue
+            records.append(TaskRecord(task["id"], task["title"], span[0], span[1] - span[0]))
+            parent_ids.append(task["Depends_on"])
+    return link(records, parent_ids)
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def build_card_properties(schema, task, depends_on):
+    values = {
+        "Status": task["column_id"],
+        "Description": task.get("description"),
+        "Start Date": task.get("start_date"),
+        "End Date": task.get("end_date"),
+        "Depends on": depends_on,
+        "Assignee": task.get("assignee_id")
+    }
+    properties = {}
+    for name, value in values.items():
+        property_id = schema.property_id(name)
+        if property_id is not None and value is not None:
+            properties[property_id] = value
+    return properties
+
+
+def bulk_create_tasks(token, board_id, tasks):
+    """Create many cards with a handful of batched calls.
+
+    Each task is a dict with a unique "key", "title", "column_id" and the
+    optional "description", "start_date", "end_date", "assignee_id" and
+    "depends_on" (a list of other task keys). Returns key -> new card id.
+    """
+    schema = api_calls.get_board_schema(token, board_id)
+    batch_size = settings.mattermost_batch_size
+    key_to_id = {}
+
+    for batch in chunked(tasks, batch_size):
+        blocks = [
+            api_calls.build_card_block(board_id, task["title"], build_card_properties(schema, task, []))
+            for task in batch
+        ]
+        response = api_calls.create_tasks(token, board_id, blocks)
+        if not response.ok:
+            raise HTTPException(status_code=response.status_code, detail="Failed to create tasks")
+        for task, block in zip(batch, response.json()):
+            key_to_id[task["key"]] = block["id"]
+
+    blocks = api_calls.get_blocks(token, board_id).json()
+    tracker_view = get_progress_tracker(blocks)
+    if tracker_view:
+        card_order = tracker_view.get("fields", {}).get("cardOrder", [])
+        card_order = card_order + [key_to_id[task["key"]] for task in tasks]
+        api_calls.set_card_order(token, board_id, tracker_view["id"], card_order)
+
+    api_calls.set_depends_on_options(token, board_id)
+
+    dependent_tasks = [task for task in tasks if task.get("depends_on")]
+    for batch in chunked(dependent_tasks, batch_size):
+        block_ids = [key_to_id[task["key"]] for task in batch]
+        block_patches = []
+        for task in batch:
+            depends_on = [key_to_id[key] for key in task["depends_on"] if key in key_to_id]
+            block_patches.append({
+                "updatedFields": {
+                    "properties": build_card_properties(schema, task, depends_on)
+                },
+                "deletedFields": []
+            })
+        response = api_calls.patch_tasks(token, board_id, block_ids, block_patches)
+        if not response.ok:
+            raise HTTPException(status_code=response.status_code, detail="Failed to set task dependencies")
+
+    return key_to_id
+
+
 def build_gantt_chart(tasks, start_field, end_field):
+    import pandas as pd
+    import plotly.express as px
+
     df = pd.DataFrame([
         {
             "Task": t["title"],
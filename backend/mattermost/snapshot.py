@@ -0,0 +1,120 @@
+from fastapi import HTTPException
+from .async_client import AsyncFocalboardClient
+from . import services
+from scheduling.cpm import schedule_records
+from scheduling.export import export_row
+from scheduling.gantt import GanttIndex, gantt_columns
+from scheduling.leveling import level_tasks
+import asyncio
+
+
+class BoardSnapshot:
+    def __init__(self, board_id, board, cards, blocks, tasks, days):
+        self.board_id = board_id
+        self.board = board
+        self.cards = cards
+        self.blocks = blocks
+        self.tasks = tasks
+        self.days = days
+        self._columns = None
+        self._records = None
+        self._critical_path = None
+        self._gantt_indexes = {}
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = services.get_columns_with_tasks(self.board, self.tasks, self.blocks)
+        return self._columns
+
+    @property
+    def records(self):
+        if self._records is None:
+            self._records = services.get_task_records(self.columns, self.days)
+        return self._records
+
+    def critical_path(self):
+        if self._critical_path is None:
+            self._critical_path = schedule_records(self.records)
+        return self._critical_path
+
+    def gantt_chart(self, start_field, end_field):
+        tasks, _, _ = self.critical_path()
+        return services.build_gantt_chart(tasks, start_field=start_field, end_field=end_field)
+
+    def gantt_columns(self, start_field, end_field):
+        tasks, _, critical_tasks = self.critical_path()
+        return gantt_columns(tasks, start_field, end_field, critical_tasks)
+
+    def gantt_index(self, start_field, end_field):
+        key = (start_field, end_field)
+        if key not in self._gantt_indexes:
+            self._gantt_indexes[key] = GanttIndex(self.gantt_columns(start_field, end_field))
+        return self._gantt_indexes[key]
+
+    def export_rows(self):
+        tasks, _, critical_tasks = self.critical_path()
+        for task in sorted(tasks.values(), key=lambda task: (task["early_start"], task["id"])):
+            yield export_row(
+                task["id"], task["title"], task["start_date"], task["end_date"],
+                task["early_start_date"], task["early_finish_date"], task["late_start_date"], task["late_finish_date"],
+                task["total_float"], task["free_float"], task["id"] in critical_tasks, task["depends_on"]
+            )
+
+    def leveled_schedule(self, capacity=1):
+        tasks, graph, _ = self.critical_path()
+        assignees = {task["id"]: task["Assignee_ID"] for task in self.tasks if task["Assignee_ID"]}
+        return level_tasks(tasks, graph, assignees, capacity)
+
+    def leveled_gantt_chart(self, capacity=1):
+        tasks = self.leveled_schedule(capacity)
+        return services.build_gantt_chart(tasks, start_field="leveled_start_date", end_field="leveled_finish_date")
+
+    def leveled_gantt_columns(self, capacity=1):
+        _, _, critical_tasks = self.critical_path()
+        return gantt_columns(self.leveled_schedule(capacity), "leveled_start_date", "leveled_finish_date", critical_tasks)
+
+    def leveled_gantt_index(self, capacity=1):
+        key = ("leveled", capacity)
+        if key not in self._gantt_indexes:
+            self._gantt_indexes[key] = GanttIndex(self.leveled_gantt_columns(capacity))
+        return self._gantt_indexes[key]
+
+    def cpm_graph(self):
+        import networkx as nx
+        from networkx.readwrite import json_graph
+
+        task_map, graph_map, critical_tasks = self.critical_path()
+        G = nx.DiGraph()
+
+        for tid, task in task_map.items():
+            G.add_node(tid, label=task["title"], color="red" if tid in critical_tasks else "gray")
+
+        for source, targets in graph_map.items():
+            for target in targets:
+                is_critical = source in critical_tasks and target in critical_tasks
+                G.add_edge(source, target, color="red" if is_critical else "gray")
+
+        return json_graph.node_link_data(G)
+
+
+async def fetch_board_snapshot(focalboard, board_id, team_id):
+    board_response, cards_response, blocks_response = await asyncio.gather(
+        focalboard.get_board(board_id),
+        focalboard.get_cards(board_id),
+        focalboard.get_blocks(board_id)
+    )
+    for response in (board_response, cards_response, blocks_response):
+        if not response.ok:
+            raise HTTPException(status_code=response.status_code, detail="Failed to fetch board")
+
+    board = board_response.json()
+    cards = cards_response.json()
+    blocks = blocks_response.json()
+    days = {}
+    tasks = services.map_card(board, cards, focalboard.token, team_id, days)
+    return BoardSnapshot(board_id, board, cards, blocks, tasks, days)
+
+
+def load_board_snapshot(token, board_id, team_id):
+    return asyncio.run(fetch_board_snapshot(AsyncFocalboardClient(token), board_id, team_id))
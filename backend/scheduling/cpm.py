@@ -0,0 +1,267 @@
+"""Critical path method shared by the local kanban and the Mattermost boards.
+
+The engine works on integer arrays: node durations plus a CSR adjacency
+(indptr/indices) of "must finish before" edges. Passes run level by level
+over the DAG, so each level is a handful of vectorized NumPy operations
+instead of a Python loop over tasks.
+
+A level costs tens of microseconds however few tasks it holds, so deep and
+narrow graphs (long chains) would spend their time in per-level overhead.
+When levels average fewer than MIN_LEVEL_WIDTH tasks the engine walks the
+topological order with plain lists instead, which costs the same per edge
+whatever the depth.
+"""
+from collections import defaultdict
+from fastapi import HTTPException
+import numpy as np
+from .records import records_from_columns, to_datetime
+
+
+# Below this average level width a scalar walk beats one NumPy round per level.
+MIN_LEVEL_WIDTH = 16
+
+
+class CycleError(ValueError):
+    def __init__(self, nodes):
+        self.nodes = nodes
+        super().__init__(f"Dependency cycle between {len(nodes)} tasks")
+
+
+class Schedule:
+    def __init__(self, early_start, early_finish, late_start, late_finish, total_float, free_float, project_duration, level):
+        self.early_start = early_start
+        self.early_finish = early_finish
+        self.late_start = late_start
+        self.late_finish = late_finish
+        self.total_float = total_float
+        self.free_float = free_float
+        self.project_duration = project_duration
+        self.level = level
+
+    @property
+    def critical(self):
+        return self.total_float == 0
+
+
+def build_csr(n, sources, targets):
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order]
+
+
+def expand_ranges(starts, ends):
+    counts = ends - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+def topological_levels(n, indptr, indices):
+    """Kahn's algorithm, one whole frontier at a time. Returns the level of every node."""
+    indegree = np.bincount(indices, minlength=n)
+    level = np.full(n, -1, dtype=np.int64)
+    frontier = np.flatnonzero(indegree == 0)
+    depth = 0
+    done = 0
+    while frontier.size:
+        if depth >= 4 * MIN_LEVEL_WIDTH and done < depth * MIN_LEVEL_WIDTH:
+            level, indegree = scalar_levels(frontier, depth, level, indegree, indptr, indices)
+            break
+        level[frontier] = depth
+        done += frontier.size
+        successors = indices[expand_ranges(indptr[frontier], indptr[frontier + 1])]
+        if not successors.size:
+            break
+        nodes, counts = np.unique(successors, return_counts=True)
+        indegree[nodes] -= counts
+        frontier = nodes[indegree[nodes] == 0]
+        depth += 1
+
+    if (indegree > 0).any():
+        raise CycleError(np.flatnonzero(indegree > 0).tolist())
+    return level
+
+
+def scalar_levels(frontier, depth, level, indegree, indptr, indices):
+    """Finish Kahn's algorithm from `frontier` one node at a time."""
+    starts = indptr.tolist()
+    targets = indices.tolist()
+    indegree = indegree.tolist()
+    level = level.tolist()
+    queue = frontier.tolist()
+    for u in queue:
+        level[u] = depth
+    for u in queue:
+        next_level = level[u] + 1
+        for v in targets[starts[u]:starts[u + 1]]:
+            if level[v] < next_level:
+                level[v] = next_level
+            indegree[v] -= 1
+            if not indegree[v]:
+                queue.append(v)
+    return np.array(level, dtype=np.int64), np.array(indegree, dtype=np.int64)
+
+
+def group_by_level(level, keys):
+    """Order of `keys` grouped by level, plus the slice bounds of every level."""
+    order = np.argsort(level[keys], kind="stable")
+    bounds = np.searchsorted(level[keys][order], np.arange(int(level.max(initial=0)) + 2))
+    return order, bounds
+
+
+def compute_schedule(durations, indptr, indices):
+    durations = np.asarray(durations, dtype=np.int64)
+    n = durations.size
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return Schedule(empty, empty, empty, empty, empty, empty, 0, empty)
+
+    sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    targets = np.asarray(indices, dtype=np.int64)
+    level = topological_levels(n, indptr, targets)
+    depth = int(level.max()) + 1
+    nodes_order, node_bounds = group_by_level(level, np.arange(n))
+
+    if depth * MIN_LEVEL_WIDTH > n:
+        early_start, late_start, project_duration = scalar_passes(durations, indptr, targets, nodes_order)
+        early_finish = early_start + durations
+        late_finish = late_start + durations
+    else:
+        early_start, early_finish, late_start, late_finish, project_duration = level_passes(
+            durations, sources, targets, level, nodes_order, node_bounds
+        )
+
+    successor_start = np.full(n, project_duration, dtype=np.int64)
+    np.minimum.at(successor_start, sources, early_start[targets])
+
+    return Schedule(
+        early_start,
+        early_finish,
+        late_start,
+        late_finish,
+        late_start - early_start,
+        successor_start - early_finish,
+        project_duration,
+        level
+    )
+
+
+def level_passes(durations, sources, targets, level, nodes_order, node_bounds):
+    n = durations.size
+    depth = len(node_bounds) - 1
+    early_start = np.zeros(n, dtype=np.int64)
+    early_finish = np.zeros(n, dtype=np.int64)
+    edge_order, edge_bounds = group_by_level(level, targets)
+    edge_sources = sources[edge_order]
+    edge_targets = targets[edge_order]
+    for d in range(depth):
+        edges = slice(edge_bounds[d], edge_bounds[d + 1])
+        np.maximum.at(early_start, edge_targets[edges], early_finish[edge_sources[edges]])
+        nodes = nodes_order[node_bounds[d]:node_bounds[d + 1]]
+        early_finish[nodes] = early_start[nodes] + durations[nodes]
+
+    project_duration = int(early_finish.max())
+
+    late_finish = np.full(n, project_duration, dtype=np.int64)
+    late_start = np.zeros(n, dtype=np.int64)
+    edge_order, edge_bounds = group_by_level(level, sources)
+    edge_sources = sources[edge_order]
+    edge_targets = targets[edge_order]
+    for d in range(depth - 1, -1, -1):
+        edges = slice(edge_bounds[d], edge_bounds[d + 1])
+        np.minimum.at(late_finish, edge_sources[edges], late_start[edge_targets[edges]])
+        nodes = nodes_order[node_bounds[d]:node_bounds[d + 1]]
+        late_start[nodes] = late_finish[nodes] - durations[nodes]
+    return early_start, early_finish, late_start, late_finish, project_duration
+
+
+def scalar_passes(durations, indptr, indices, order):
+    """Forward and backward pass over a topological `order`, one node at a time."""
+    starts = indptr.tolist()
+    targets = indices.tolist()
+    duration = durations.tolist()
+    order = order.tolist()
+
+    early_start = [0] * len(duration)
+    for u in order:
+        finish = early_start[u] + duration[u]
+        for v in targets[starts[u]:starts[u + 1]]:
+            if early_start[v] < finish:
+                early_start[v] = finish
+    project_duration = max(start + length for start, length in zip(early_start, duration))
+
+    late_start = [0] * len(duration)
+    for u in reversed(order):
+        finish = project_duration
+        for v in targets[starts[u]:starts[u + 1]]:
+            if late_start[v] < finish:
+                finish = late_start[v]
+        late_start[u] = finish - duration[u]
+    return np.array(early_start, dtype=np.int64), np.array(late_start, dtype=np.int64), project_duration
+
+
+def task_entry(tid, title, start, duration, depends_on, early_start, late_start, free_float, project_start):
+    """One task of the (tasks, graph, critical) result. Days are epoch days."""
+    return {
+        "id": tid,
+        "title": title,
+        "duration": duration,
+        "start_date": to_datetime(start),
+        "end_date": to_datetime(start + duration),
+        "depends_on": depends_on,
+        "early_start": early_start,
+        "early_finish": early_start + duration,
+        "late_start": late_start,
+        "late_finish": late_start + duration,
+        "total_float": late_start - early_start,
+        "free_float": free_float,
+        "early_start_date": to_datetime(project_start + early_start),
+        "early_finish_date": to_datetime(project_start + early_start + duration),
+        "late_start_date": to_datetime(project_start + late_start),
+        "late_finish_date": to_datetime(project_start + late_start + duration)
+    }
+
+
+def schedule_records(records):
+    """CPM over TaskRecords. Returns (tasks, graph, critical) in the shape the
+    Gantt and CPM graph views expect."""
+    n = len(records)
+    sources = [p for record in records for p in record.parents]
+    targets = [i for i, record in enumerate(records) for _ in record.parents]
+    durations = [record.duration for record in records]
+    indptr, indices = build_csr(n, sources, targets)
+    try:
+        schedule = compute_schedule(durations, indptr, indices)
+    except CycleError:
+        raise HTTPException(status_code=400, detail="Task dependencies contain a cycle")
+
+    graph = defaultdict(list)
+    for record in records:
+        for p in record.parents:
+            graph[records[p].id].append(record.id)
+
+    tasks = {}
+    if n:
+        project_start = min(record.start for record in records)
+        early_start = schedule.early_start.tolist()
+        late_start = schedule.late_start.tolist()
+        free_float = schedule.free_float.tolist()
+        for i, record in enumerate(records):
+            tasks[record.id] = task_entry(
+                record.id, record.title, record.start, record.duration, [records[p].id for p in record.parents],
+                early_start[i], late_start[i], free_float[i], project_start
+            )
+
+    critical_tasks = {tid for tid, task in tasks.items() if task["total_float"] == 0}
+    return tasks, graph, critical_tasks
+
+
+def calculate_critical_path(data):
+    """Wrapper for callers that still hold column/task dicts with Start_Date,
+    End_Date and Depends_on."""
+    return schedule_records(records_from_columns(data))
@@ -0,0 +1,57 @@
+"""Row-by-row schedule export.
+
+Rows come from a generator and go out in chunks of `chunk_size` rows, so
+an export holds one chunk in memory no matter how large the board is.
+"""
+from datetime import date, datetime
+from typing import Literal
+import csv
+import io
+import json
+
+
+ExportFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+EXPORT_FIELDS = (
+    "id", "title", "start_date", "end_date", "early_start", "early_finish", "late_start", "late_finish",
+    "total_float", "free_float", "critical", "depends_on"
+)
+
+
+def iso_date(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def export_row(task_id, title, start_date, end_date, early_start, early_finish, late_start, late_finish,
+               total_float, free_float, critical, depends_on):
+    """One row in EXPORT_FIELDS order, dates as ISO days."""
+    return (
+        task_id, title, iso_date(start_date), iso_date(end_date), iso_date(early_start), iso_date(early_finish),
+        iso_date(late_start), iso_date(late_finish), total_float, free_float, bool(critical), list(depends_on or ())
+    )
+
+
+def stream_rows(rows, format, chunk_size=1000):
+    buffer = io.StringIO()
+    if format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+    pending = 0
+    for row in rows:
+        if format == "csv":
+            writer.writerow((*row[:-1], " ".join(str(tid) for tid in row[-1])))
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row))))
+            buffer.write("\n")
+        pending += 1
+        if pending == chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
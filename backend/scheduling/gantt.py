@@ -0,0 +1,161 @@
+"""Columnar Gantt payloads.
+
+Instead of a serialized Plotly figure, the chart is sent as parallel arrays
+sorted by start: ids, titles, start and end in epoch days (end exclusive),
+critical flags, total float and dependencies as [parent, child] index
+pairs into those arrays. The frontend turns them into bars itself, so the
+request path needs neither pandas nor plotly.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+from typing import Literal, Optional
+from fastapi import HTTPException
+from .records import epoch_day
+
+
+GanttFormat = Literal["columnar", "plotly"]
+
+
+def columnar(ids, titles, start, end, parents, critical=None, slack=None):
+    """`parents[i]` holds indices into the same lists."""
+    order = sorted(range(len(ids)), key=start.__getitem__)
+    position = [0] * len(ids)
+    for i, k in enumerate(order):
+        position[k] = i
+
+    payload = {
+        "format": "columnar",
+        "ids": [ids[k] for k in order],
+        "titles": [titles[k] for k in order],
+        "start": [start[k] for k in order],
+        "end": [end[k] for k in order],
+        "dependencies": [[position[p], position[k]] for k in order for p in parents[k]],
+        "range": [min(start), max(end)] if ids else None
+    }
+    if critical is not None:
+        payload["critical"] = [critical[k] for k in order]
+    if slack is not None:
+        payload["slack"] = [slack[k] for k in order]
+    return payload
+
+
+def gantt_columns(tasks, start_field, end_field, critical_tasks=None):
+    """Payload for a (tasks, graph, critical) task map and one pair of date fields."""
+    items = list(tasks.values())
+    index = {task["id"]: i for i, task in enumerate(items)}
+    return columnar(
+        [task["id"] for task in items],
+        [task["title"] for task in items],
+        [epoch_day(task[start_field]) for task in items],
+        [epoch_day(task[end_field]) for task in items],
+        [[index[p] for p in task["depends_on"] if p in index] for task in items],
+        None if critical_tasks is None else [task["id"] in critical_tasks for task in items],
+        [task["total_float"] for task in items] if items and "total_float" in items[0] else None
+    )
+
+
+def records_gantt(records):
+    """Payload for the planned dates of TaskRecords."""
+    return columnar(
+        [record.id for record in records],
+        [record.title for record in records],
+        [record.start for record in records],
+        [record.end for record in records],
+        [record.parents for record in records]
+    )
+
+
+def gantt_viewport(
+        window_start: Optional[date] = None,
+        window_end: Optional[date] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        critical_only: bool = False,
+        max_slack: Optional[int] = None,
+        format: GanttFormat = "columnar"
+    ):
+    """Query parameters of a windowed Gantt request, or None for the full chart."""
+    if window_start is None and window_end is None and not offset and limit is None and not critical_only and max_slack is None:
+        return None
+    if format != "columnar":
+        raise HTTPException(status_code=400, detail="Viewport queries are only available with format=columnar")
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit >= 1")
+    if window_start and window_end and window_end < window_start:
+        raise HTTPException(status_code=400, detail="window_end is before window_start")
+    return {
+        "window_start": epoch_day(window_start) if window_start else None,
+        "window_end": epoch_day(window_end) if window_end else None,
+        "offset": offset,
+        "limit": limit,
+        "critical_only": critical_only,
+        "max_slack": max_slack
+    }
+
+
+class GanttIndex:
+    """A columnar payload kept for viewport queries.
+
+    Rows are sorted by start, and `reach[i]` is the latest end among rows
+    0..i, so the rows overlapping a time window lie between two bisections.
+    Critical rows have their own sorted position list for the same reason.
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.start = payload["start"]
+        self.end = payload["end"]
+        self.reach = list(accumulate(self.end, max))
+        self.critical = payload.get("critical")
+        self.slack = payload.get("slack")
+        self.critical_rows = [i for i, flag in enumerate(self.critical or ()) if flag]
+        self.parents = [[] for _ in self.start]
+        for parent, child in payload["dependencies"]:
+            self.parents[child].append(parent)
+
+    def __len__(self):
+        return len(self.start)
+
+    def rows(self, window_start=None, window_end=None, critical_only=False, max_slack=None):
+        """Positions of the rows matching the filters, in start order."""
+        # Bars are [start, end) days; a zero-length bar counts when its day is inside the window.
+        lo = 0 if window_start is None else bisect_left(self.reach, window_start)
+        hi = len(self) if window_end is None else bisect_right(self.start, window_end)
+        if critical_only:
+            if self.critical is None:
+                raise HTTPException(status_code=400, detail="This chart has no critical path")
+            rows = self.critical_rows[bisect_left(self.critical_rows, lo):bisect_left(self.critical_rows, hi)]
+        else:
+            rows = range(lo, hi)
+        if window_start is not None:
+            rows = [i for i in rows if self.end[i] > window_start or self.start[i] >= window_start]
+        if max_slack is not None:
+            if self.slack is None:
+                raise HTTPException(status_code=400, detail="This chart has no slack")
+            rows = [i for i in rows if self.slack[i] < max_slack]
+        return rows
+
+    def query(self, window_start=None, window_end=None, offset=0, limit=None, critical_only=False, max_slack=None):
+        """The matching rows from `offset`, at most `limit` of them, plus the counts
+        a client needs to size its scroll area."""
+        rows = self.rows(window_start, window_end, critical_only, max_slack)
+        visible = rows[offset:None if limit is None else offset + limit]
+        position = {row: i for i, row in enumerate(visible)}
+        result = {
+            "format": "columnar",
+            "total": len(self),
+            "matched": len(rows),
+            "offset": offset,
+            "ids": [self.payload["ids"][i] for i in visible],
+            "titles": [self.payload["titles"][i] for i in visible],
+            "start": [self.start[i] for i in visible],
+            "end": [self.end[i] for i in visible],
+            "dependencies": [[position[p], position[i]] for i in visible for p in self.parents[i] if p in position],
+            "range": self.payload["range"]
+        }
+        if self.critical is not None:
+            result["critical"] = [self.critical[i] for i in visible]
+        if self.slack is not None:
+            result["slack"] = [self.slack[i] for i in visible]
+        return result
@@ -0,0 +1,94 @@
+"""Resource-constrained scheduling with a serial schedule generation scheme.
+
+Tasks are placed one at a time, highest priority first (smallest CPM late
+start, then early start), once all their predecessors are placed. A task
+starts at the later of its predecessors' finish and the moment one of its
+assignee's units is free. Eligible tasks sit in a heap and every assignee
+keeps a short sorted list of unit free times, so a pass is O((n + e) log n)
+for capacity 1.
+"""
+from bisect import bisect_right, insort
+from datetime import timedelta
+import heapq
+import numpy as np
+from .cpm import CycleError, build_csr
+
+
+def level_resources(durations, indptr, indices, resources, priority, capacity=1):
+    """Start offset of every task. `resources[i]` is None for unassigned tasks,
+    which are only bound by their predecessors."""
+    n = len(durations)
+    indptr = np.asarray(indptr).tolist()
+    indices = np.asarray(indices).tolist()
+    indegree = [0] * n
+    for target in indices:
+        indegree[target] += 1
+
+    ready = [0] * n
+    start = [0] * n
+    heap = [(priority[i], i) for i in range(n) if not indegree[i]]
+    heapq.heapify(heap)
+    units = {}
+    placed = 0
+    while heap:
+        _, i = heapq.heappop(heap)
+        begin = ready[i]
+        resource = resources[i]
+        if resource is not None:
+            free = units.setdefault(resource, [0] * capacity)
+            # Best fit: the unit that became free last before `begin`, else the first one free.
+            unit = bisect_right(free, begin) - 1
+            if unit < 0:
+                unit = 0
+                begin = free[0]
+            del free[unit]
+            insort(free, begin + durations[i])
+
+        start[i] = begin
+        finish = begin + durations[i]
+        placed += 1
+        for target in indices[indptr[i]:indptr[i + 1]]:
+            if finish > ready[target]:
+                ready[target] = finish
+            indegree[target] -= 1
+            if not indegree[target]:
+                heapq.heappush(heap, (priority[target], target))
+
+    if placed < n:
+        raise CycleError([i for i in range(n) if indegree[i]])
+    return start
+
+
+def level_tasks(tasks, graph, assignees, capacity=1):
+    """Adds leveled_start_date / leveled_finish_date to a calculate_critical_path result."""
+    ids = list(tasks)
+    index = {tid: i for i, tid in enumerate(ids)}
+    sources = []
+    targets = []
+    for source, children in graph.items():
+        if source not in index:
+            continue
+        for target in children:
+            if target in index:
+                sources.append(index[source])
+                targets.append(index[target])
+    indptr, indices = build_csr(len(ids), sources, targets)
+
+    durations = [tasks[tid]["duration"] for tid in ids]
+    priority = [(tasks[tid]["late_start"], tasks[tid]["early_start"]) for tid in ids]
+    resources = [assignees.get(tid) for tid in ids]
+    start = level_resources(durations, indptr, indices, resources, priority, capacity)
+
+    leveled = {}
+    for i, tid in enumerate(ids):
+        task = tasks[tid]
+        project_start = task["early_start_date"] - timedelta(days=task["early_start"])
+        leveled[tid] = {
+            **task,
+            "assignee": resources[i],
+            "leveled_start": start[i],
+            "leveled_finish": start[i] + durations[i],
+            "leveled_start_date": project_start + timedelta(days=start[i]),
+            "leveled_finish_date": project_start + timedelta(days=start[i] + durations[i])
+        }
+    return leveled
@@ -0,0 +1,147 @@
+"""Monte Carlo schedule risk on top of the CPM engine.
+
+Every task gets a three-point estimate (optimistic, most likely,
+pessimistic, in days) and durations are drawn from the matching Beta-PERT
+distribution by inverse-CDF lookup. Forward and backward passes run over a block of samples at
+once: the arrays are (tasks, samples) and each DAG level is one reduceat
+per pass, so the Python loop is over levels and chunks, never over
+samples or tasks.
+"""
+from functools import lru_cache
+import numpy as np
+from .cpm import topological_levels
+from .pool import get_executor
+
+
+def level_groups(level, keys, others):
+    """Per level: `others` ordered by their key, the segment starts and the unique keys."""
+    order = np.lexsort((keys, level[keys]))
+    keys = keys[order]
+    others = others[order]
+    bounds = np.searchsorted(level[keys], np.arange(int(level.max(initial=0)) + 2))
+    groups = []
+    for d in range(len(bounds) - 1):
+        segment = keys[bounds[d]:bounds[d + 1]]
+        unique, starts = np.unique(segment, return_index=True)
+        groups.append((others[bounds[d]:bounds[d + 1]], starts, unique))
+    return groups
+
+
+class LevelPlan:
+    def __init__(self, n, indptr, indices):
+        sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        targets = np.asarray(indices, dtype=np.int64)
+        level = topological_levels(n, indptr, targets)
+        order = np.argsort(level, kind="stable")
+        bounds = np.searchsorted(level[order], np.arange(int(level.max(initial=0)) + 2))
+        self.n = n
+        self.nodes = [order[bounds[d]:bounds[d + 1]] for d in range(len(bounds) - 1)]
+        self.incoming = level_groups(level, targets, sources)
+        self.outgoing = level_groups(level, sources, targets)
+
+
+QUANTILES = 4096
+
+# Normalized modes (m - a) / (b - a) are rounded to this many steps, so the
+# tables stay a fixed, shared set however many distinct estimates a board has.
+MODE_STEPS = 64
+
+
+@lru_cache(maxsize=1)
+def pert_table():
+    """Beta-PERT quantiles on [0, 1], one row per mode 0, 1/MODE_STEPS, ..., 1.
+
+    Beta(a, b) with a, b >= 1 has a bounded density, so its CDF is
+    integrated on a fine grid and inverted by interpolation. Sampling then
+    costs one uniform draw and one table lookup per duration, scaled to
+    a + (b - a) * x.
+    """
+    grid = np.linspace(0.0, 1.0, 4 * QUANTILES + 1)
+    probabilities = (np.arange(QUANTILES) + 0.5) / QUANTILES
+    tables = np.empty((MODE_STEPS + 1, QUANTILES), dtype=np.float32)
+    for row in range(MODE_STEPS + 1):
+        shape = row / MODE_STEPS
+        alpha = 1 + 4 * shape
+        beta = 1 + 4 * (1 - shape)
+        density = grid ** (alpha - 1) * (1 - grid) ** (beta - 1)
+        cdf = np.concatenate([[0.0], np.cumsum((density[1:] + density[:-1]) / 2)])
+        tables[row] = np.interp(probabilities, cdf / cdf[-1], grid)
+    tables.flags.writeable = False
+    return tables
+
+
+def pert_tables(optimistic, likely, pessimistic):
+    """The shared quantile table and every task's row in it."""
+    spread = pessimistic - optimistic
+    mode = np.divide(likely - optimistic, spread, out=np.full_like(spread, 0.5), where=spread > 0)
+    shape_index = np.rint(np.clip(mode, 0.0, 1.0) * MODE_STEPS).astype(np.int64)
+    return pert_table(), shape_index
+
+
+def sample_pert(rng, optimistic, spread, tables, shape_index, size):
+    draws = rng.integers(0, QUANTILES, size=(optimistic.size, size), dtype=np.int32)
+    draws += (shape_index * QUANTILES).astype(np.int32)[:, None]
+    durations = tables.ravel().take(draws)
+    durations *= spread[:, None]
+    durations += optimistic[:, None]
+    return durations
+
+
+def simulate_chunk(plan, durations):
+    """Project durations (samples,) and critical flags (tasks, samples) for one block."""
+    early_start = np.zeros_like(durations)
+    early_finish = np.zeros_like(durations)
+    for nodes, (sources, starts, targets) in zip(plan.nodes, plan.incoming):
+        if targets.size:
+            early_start[targets] = np.maximum.reduceat(early_finish[sources], starts, axis=0)
+        early_finish[nodes] = early_start[nodes] + durations[nodes]
+
+    project = early_finish.max(axis=0)
+    late_start = np.empty_like(durations)
+    late_finish = np.broadcast_to(project, durations.shape).copy()
+    for nodes, (targets, starts, sources) in zip(reversed(plan.nodes), reversed(plan.outgoing)):
+        if sources.size:
+            late_finish[sources] = np.minimum.reduceat(late_start[targets], starts, axis=0)
+        late_start[nodes] = late_finish[nodes] - durations[nodes]
+
+    # float32 sums along different paths can disagree in the last bits.
+    return project, (late_start - early_start) <= 1e-3
+
+
+def simulate_batch(n, indptr, indices, optimistic, likely, pessimistic, samples, seed, chunk_size):
+    plan = LevelPlan(n, indptr, indices)
+    rng = np.random.default_rng(seed)
+    tables, shape_index = pert_tables(optimistic, likely, pessimistic)
+    spread = (pessimistic - optimistic).astype(np.float32)
+    optimistic = optimistic.astype(np.float32)
+    projects = []
+    critical = np.zeros(n, dtype=np.int64)
+    for offset in range(0, samples, chunk_size):
+        size = min(chunk_size, samples - offset)
+        project, on_path = simulate_chunk(plan, sample_pert(rng, optimistic, spread, tables, shape_index, size))
+        projects.append(project)
+        critical += on_path.sum(axis=1)
+    return np.concatenate(projects) if projects else np.empty(0), critical
+
+
+def simulate(indptr, indices, optimistic, likely, pessimistic, samples, seed=None, chunk_size=1024, workers=0):
+    """Returns (project duration per sample, criticality index per task)."""
+    optimistic = np.asarray(optimistic, dtype=np.float64)
+    likely = np.asarray(likely, dtype=np.float64)
+    pessimistic = np.asarray(pessimistic, dtype=np.float64)
+    n = optimistic.size
+    batches = max(1, min(workers, samples // chunk_size)) if workers else 1
+    sizes = [samples // batches + (i < samples % batches) for i in range(batches)]
+    seeds = np.random.SeedSequence(seed).spawn(batches)
+    args = (n, indptr, indices, optimistic, likely, pessimistic)
+
+    if batches == 1:
+        results = [simulate_batch(*args, sizes[0], seeds[0], chunk_size)]
+    else:
+        executor = get_executor()
+        futures = [executor.submit(simulate_batch, *args, size, seq, chunk_size) for size, seq in zip(sizes, seeds)]
+        results = [future.result() for future in futures]
+
+    projects = np.concatenate([project for project, _ in results])
+    critical = sum(counts for _, counts in results)
+    return projects, critical / max(samples, 1)
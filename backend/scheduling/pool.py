@@ -0,0 +1,32 @@
+"""Process pool shared by the CPU-bound schedule jobs (Monte Carlo, portfolio CPM).
+
+The pool is created on first use with `process_pool_workers` processes; the
+per-job worker settings only decide how many pieces a job is split into.
+The app shuts it down on exit.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import threading
+from core.config import get_settings
+
+
+settings = get_settings()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=settings.process_pool_workers)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,62 @@
+"""Schedule health for many boards at once.
+
+Each board is reduced to plain arrays (epoch-day starts, durations and the
+dependency edges as index pairs), so a batch pickles cheaply. Batches of
+boards run through CPM on the shared process pool and only the small
+summary dicts travel back.
+"""
+import numpy as np
+from .cpm import CycleError, build_csr, compute_schedule
+from .pool import get_executor
+from .records import to_datetime
+
+
+def day_iso(day):
+    return to_datetime(int(day)).date().isoformat()
+
+
+def summarize_board(starts, durations, sources, targets):
+    n = len(durations)
+    if n == 0:
+        return {"task_count": 0}
+
+    indptr, indices = build_csr(n, sources, targets)
+    try:
+        schedule = compute_schedule(durations, indptr, indices)
+    except CycleError as exc:
+        return {"task_count": n, "error": "Task dependencies contain a cycle", "cycle_size": len(exc.nodes)}
+
+    project_start = int(starts.min())
+    total_float = schedule.total_float
+    return {
+        "task_count": n,
+        "dependency_count": len(sources),
+        "project_start": day_iso(project_start),
+        "project_duration": schedule.project_duration,
+        "projected_finish": day_iso(project_start + schedule.project_duration),
+        "planned_finish": day_iso((starts + durations).max()),
+        "critical_tasks": int(np.count_nonzero(total_float == 0)),
+        "slack": {
+            "mean": round(float(total_float.mean()), 2),
+            "median": float(np.median(total_float)),
+            "max": int(total_float.max()),
+            "free_mean": round(float(schedule.free_float.mean()), 2),
+            "zero_ratio": round(float(np.count_nonzero(total_float == 0)) / n, 4)
+        }
+    }
+
+
+def summarize_batch(boards):
+    return [(board_id, summarize_board(*arrays)) for board_id, *arrays in boards]
+
+
+def summarize_boards(boards, workers=0, batch_size=32):
+    """`boards` is a list of (board_id, starts, durations, sources, targets).
+    Returns {board_id: summary}; runs inline when one batch is enough."""
+    batches = [boards[i:i + batch_size] for i in range(0, len(boards), batch_size)]
+    if not workers or len(batches) <= 1:
+        return dict(summarize_batch(boards))
+
+    executor = get_executor()
+    futures = [executor.submit(summarize_batch, batch) for batch in batches]
+    return {board_id: summary for future in futures for board_id, summary in future.result()}
@@ -0,0 +1,64 @@
+"""Compact task records for the schedule pipelines.
+
+Dates are whole days since 1970-01-01 and dependencies are indices into the
+same record list, so CPM, leveling and the Gantt builders work on integers
+instead of formatting and re-parsing date strings per task.
+"""
+from datetime import date, datetime, timedelta
+
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+DAY_MS = 86_400_000
+
+
+class TaskRecord:
+    __slots__ = ("id", "title", "start", "duration", "parents")
+
+    def __init__(self, id, title, start, duration, parents=()):
+        self.id = id
+        self.title = title
+        self.start = start
+        self.duration = duration
+        self.parents = parents
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    def __repr__(self):
+        return f"TaskRecord(id={self.id!r}, start={self.start}, duration={self.duration}, parents={self.parents})"
+
+
+def epoch_day(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def to_datetime(day):
+    return EPOCH + timedelta(days=day)
+
+
+def link(records, parent_ids):
+    """Turn each record's parent ids into indices; ids outside `records` are dropped."""
+    index = {record.id: i for i, record in enumerate(records)}
+    for record, ids in zip(records, parent_ids):
+        record.parents = tuple(index[p] for p in ids if p in index)
+    return records
+
+
+def records_from_columns(data):
+    """Records from the column/task dicts the routers used to pass to CPM."""
+    records = []
+    parent_ids = []
+    for board in data:
+        for task in board["tasks"]:
+            if not task.get("Start_Date") or not task.get("End_Date"):
+                continue
+            start = epoch_day(task["Start_Date"])
+            records.append(TaskRecord(task["id"], task["title"], start, epoch_day(task["End_Date"]) - start))
+            parent_ids.append(task.get("Depends_on") or [])
+    return link(records, parent_ids)
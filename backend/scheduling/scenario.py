@@ -0,0 +1,215 @@
+"""What-if edits on top of a board's ScheduleState.
+
+A ScenarioState reads through to the live state and keeps its own writes:
+dict tables are overlays, the per-task edge sets are copied the first time
+they are touched, and the two heaps keep a count delta over the base heap.
+An edit therefore costs the same as on the live state (only the tasks it
+reaches are visited) and the live state is never modified.
+"""
+from collections import Counter, defaultdict
+from collections.abc import MutableMapping
+import heapq
+from .cpm import CycleError
+from .records import to_datetime
+from .state import ScheduleState
+
+
+class Overlay(MutableMapping):
+    def __init__(self, base):
+        self.base = base
+        self.local = {}
+        self.deleted = set()
+
+    def __getitem__(self, key):
+        if key in self.local:
+            return self.local[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        value = self.base[key]
+        if isinstance(value, set):
+            value = self.local[key] = set(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self.local[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.local.pop(key, None)
+        self.deleted.add(key)
+
+    def __contains__(self, key):
+        return key in self.local or (key not in self.deleted and key in self.base)
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.local and key not in self.deleted:
+                yield key
+        yield from self.local
+
+    def __len__(self):
+        hidden = sum(1 for key in self.deleted if key in self.base)
+        return len(self.base) - hidden + sum(1 for key in self.local if key not in self.base)
+
+
+class OverlayHeap:
+    """LazyHeap interface over a base LazyHeap that is only read."""
+
+    def __init__(self, base):
+        self.base = base
+        self.delta = Counter()
+        self.heap = []
+
+    def count(self, value):
+        return self.base.counts.get(value, 0) + self.delta[value]
+
+    def add(self, value):
+        self.delta[value] += 1
+        heapq.heappush(self.heap, value)
+
+    def remove(self, value):
+        self.delta[value] -= 1
+
+    def min(self, default=0):
+        while self.heap and self.count(self.heap[0]) <= 0:
+            heapq.heappop(self.heap)
+        best = self.heap[0] if self.heap else None
+
+        # Walk the base heap in order without popping it, skipping values removed here.
+        base = self.base.heap
+        frontier = [(base[0], 0)] if base else []
+        while frontier:
+            value, i = heapq.heappop(frontier)
+            if best is not None and value >= best:
+                break
+            if self.count(value) > 0:
+                best = value
+                break
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(base):
+                    heapq.heappush(frontier, (base[child], child))
+        return default if best is None else best
+
+
+class ScenarioState(ScheduleState):
+    def __init__(self, base):
+        self.lock = base.lock
+        for table in ("titles", "starts", "durations", "depends", "preds", "succs", "rank", "early_start", "tail"):
+            setattr(self, table, Overlay(getattr(base, table)))
+        self.finishes = OverlayHeap(base.finishes)
+        self.start_days = OverlayHeap(base.start_days)
+        self.next_rank = base.next_rank
+        self.version = base.version
+        self.changed = set()
+        self.removed = set()
+        self.published = None
+
+    def apply_edit(self, edit):
+        """`edit` holds task_id and any of start, end (epoch days), shift_days,
+        duration, add_parents and remove_parents."""
+        tid = edit["task_id"]
+        start = self.starts[tid]
+        duration = self.durations[tid]
+        if edit.get("start") is not None:
+            start = edit["start"]
+        if edit.get("end") is not None:
+            duration = edit["end"] - start
+        start += edit.get("shift_days") or 0
+        if edit.get("duration") is not None:
+            duration = edit["duration"]
+        if duration < 0:
+            raise ValueError(f"Task {tid} would end before it starts")
+
+        removed = set(edit.get("remove_parents") or ())
+        parents = [p for p in self.depends[tid] if p not in removed]
+        parents += [p for p in edit.get("add_parents") or () if p not in parents]
+        self.set_task(tid, self.titles[tid], start, duration, parents)
+
+
+def iso(day):
+    return to_datetime(day).date().isoformat()
+
+
+def placement(state, tid, duration, project_start):
+    """(early start, late start, length) of a task in epoch days."""
+    return (
+        project_start + state.early_start[tid],
+        project_start + duration - state.tail[tid],
+        state.durations[tid]
+    )
+
+
+def snapshot(early_start, late_start, length):
+    return {
+        "early_start_date": iso(early_start),
+        "early_finish_date": iso(early_start + length),
+        "late_start_date": iso(late_start),
+        "late_finish_date": iso(late_start + length),
+        "total_float": late_start - early_start
+    }
+
+
+def evaluate_scenarios(state, scenarios):
+    """Evaluate every scenario (a name and a list of edits) against `state`.
+
+    Each result has the new finish, its delta against the baseline, the
+    critical path and how it moved, and before/after dates for the tasks the
+    edits reached whose dates actually moved. Tasks that were not reached only
+    move through the project start or duration, which the summary already
+    reports.
+    """
+    with state.lock:
+        duration = state.project_duration
+        project_start = state.start_days.min()
+        by_length = defaultdict(set)
+        for tid, early_start in state.early_start.items():
+            by_length[early_start + state.tail[tid]].add(tid)
+        critical = by_length.get(duration, set())
+        baseline = {
+            "project_start": iso(project_start),
+            "project_duration": duration,
+            "projected_finish": iso(project_start + duration),
+            "critical_path": sorted(critical)
+        }
+
+        results = []
+        for name, edits in scenarios:
+            view = ScenarioState(state)
+            try:
+                for edit in edits:
+                    view.apply_edit(edit)
+            except CycleError as exc:
+                results.append({"name": name, "error": f"Dependency cycle: {' -> '.join(str(tid) for tid in exc.nodes)}"})
+                continue
+            except ValueError as exc:
+                results.append({"name": name, "error": str(exc)})
+                continue
+
+            new_duration = view.project_duration
+            new_start = view.start_days.min()
+            touched = view.changed & view.durations.keys()
+            # A task the edits never reached keeps its longest path through itself.
+            new_critical = {tid for tid in by_length.get(new_duration, ()) if tid not in touched} if new_duration <= duration else set()
+            new_critical |= {tid for tid in touched if view.early_start[tid] + view.tail[tid] == new_duration}
+
+            moved = []
+            for tid in sorted(touched):
+                before = placement(state, tid, duration, project_start)
+                after = placement(view, tid, new_duration, new_start)
+                if before != after:
+                    moved.append({"id": tid, "title": view.titles[tid], "before": snapshot(*before), "after": snapshot(*after)})
+
+            results.append({
+                "name": name,
+                "project_start": iso(new_start),
+                "project_duration": new_duration,
+                "projected_finish": iso(new_start + new_duration),
+                "finish_delta_days": (new_start + new_duration) - (project_start + duration),
+                "critical_path": sorted(new_critical),
+                "critical_added": sorted(new_critical - critical),
+                "critical_removed": sorted(critical - new_critical),
+                "tasks": moved
+            })
+    return {"baseline": baseline, "scenarios": results}
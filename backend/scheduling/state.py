@@ -0,0 +1,311 @@
+"""Per-board schedule that is kept up to date as tasks are edited.
+
+A full build goes through the array engine in scheduling.cpm. Afterwards,
+every edit re-propagates only the tasks it can reach: early starts move
+forward through successors, and tails (longest path from a task's start
+to the end of the project) move backward through predecessors. Storing
+the tail rather than the late start means a change in project length
+does not touch every task. Late start is simply duration - tail.
+
+Tasks carry a rank that is kept topologically sorted as edges are added
+(Pearce-Kelly): a new edge that goes against the order only reshuffles
+the ranks of the tasks lying between its two ends, so the graph is never
+sorted again after the first build.
+"""
+from collections import Counter
+import heapq
+import threading
+import numpy as np
+from .cpm import CycleError, build_csr, compute_schedule, task_entry
+from .records import epoch_day
+
+
+class LazyHeap:
+    """Multiset of ints with a cheap minimum; removed values leave the heap lazily."""
+
+    def __init__(self, values=()):
+        self.counts = Counter(values)
+        self.heap = list(self.counts)
+        heapq.heapify(self.heap)
+
+    def add(self, value):
+        if not self.counts[value]:
+            heapq.heappush(self.heap, value)
+        self.counts[value] += 1
+
+    def remove(self, value):
+        self.counts[value] -= 1
+        if not self.counts[value]:
+            del self.counts[value]
+
+    def min(self, default=0):
+        while self.heap and self.heap[0] not in self.counts:
+            heapq.heappop(self.heap)
+        return self.heap[0] if self.heap else default
+
+
+class ScheduleState:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.titles = {}
+        self.starts = {}
+        self.durations = {}
+        self.depends = {}
+        self.preds = {}
+        self.succs = {}
+        self.rank = {}
+        self.early_start = {}
+        self.tail = {}
+        self.finishes = LazyHeap()
+        self.start_days = LazyHeap()
+        self.next_rank = 0
+        self.version = None
+        self.changed = set()
+        self.removed = set()
+        self.published = None
+
+    @classmethod
+    def from_records(cls, records):
+        state = cls()
+        for record in records:
+            tid = record.id
+            state.titles[tid] = record.title
+            state.starts[tid] = record.start
+            state.durations[tid] = record.duration
+            state.depends[tid] = [records[p].id for p in record.parents]
+            if tid in state.depends[tid]:
+                raise CycleError([tid, tid])
+            state.preds[tid] = set(state.depends[tid])
+            state.succs[tid] = set()
+        for tid, preds in state.preds.items():
+            for p in preds:
+                state.succs[p].add(tid)
+        state.rebuild()
+        return state
+
+    def __len__(self):
+        return len(self.durations)
+
+    def rebuild(self):
+        """Recompute everything with the array engine. Raises CycleError."""
+        ids = list(self.durations)
+        index = {tid: i for i, tid in enumerate(ids)}
+        sources = [index[p] for tid in ids for p in self.preds[tid]]
+        targets = [index[tid] for tid in ids for _ in self.preds[tid]]
+        indptr, indices = build_csr(len(ids), sources, targets)
+        schedule = compute_schedule([self.durations[tid] for tid in ids], indptr, indices)
+
+        order = np.argsort(schedule.level, kind="stable").tolist()
+        self.rank = {ids[i]: rank for rank, i in enumerate(order)}
+        self.next_rank = len(ids)
+        duration = schedule.project_duration
+        self.early_start = dict(zip(ids, schedule.early_start.tolist()))
+        self.tail = {tid: duration - late for tid, late in zip(ids, schedule.late_start.tolist())}
+        self.finishes = LazyHeap(-(self.early_start[tid] + self.durations[tid]) for tid in ids)
+        self.start_days = LazyHeap(self.starts.values())
+        self.published = None
+
+    def upsert_task(self, tid, title, start_date, end_date, parent_ids):
+        """Add or change a task. If this raises CycleError the state must be dropped."""
+        start = epoch_day(start_date)
+        self.set_task(tid, title, start, epoch_day(end_date) - start, parent_ids)
+
+    def set_task(self, tid, title, start, duration, parent_ids):
+        """upsert_task with the start and duration already in epoch days."""
+        if tid in parent_ids:
+            raise CycleError([tid, tid])
+        with self.lock:
+            new_preds = {p for p in parent_ids if p in self.durations}
+            if tid in self.durations:
+                self.finishes.remove(-(self.early_start[tid] + self.durations[tid]))
+                self.start_days.remove(self.starts[tid])
+            else:
+                self.rank[tid] = self.next_rank
+                self.next_rank += 1
+                self.preds[tid] = set()
+                self.succs[tid] = set()
+                self.early_start[tid] = 0
+                self.tail[tid] = duration
+
+            self.changed.add(tid)
+            self.titles[tid] = title
+            self.starts[tid] = start
+            self.durations[tid] = duration
+            self.depends[tid] = [p for p in parent_ids if p in new_preds]
+            self.finishes.add(-(self.early_start[tid] + duration))
+            self.start_days.add(start)
+
+            old_preds = set(self.preds[tid])
+            self.changed.update(old_preds ^ new_preds)
+            for p in old_preds - new_preds:
+                self.succs[p].discard(tid)
+                self.preds[tid].discard(p)
+            for p in new_preds - old_preds:
+                self.reorder(p, tid)
+                self.succs[p].add(tid)
+                self.preds[tid].add(p)
+            self.propagate_forward([tid])
+            self.propagate_backward([tid, *(old_preds ^ new_preds)])
+
+    def find_path(self, source, target, bound):
+        """Successor path from source to target through tasks ranked at most `bound`."""
+        came_from = {source: None}
+        stack = [source]
+        while stack:
+            tid = stack.pop()
+            if tid == target:
+                path = []
+                while tid is not None:
+                    path.append(tid)
+                    tid = came_from[tid]
+                return path[::-1]
+            for s in self.succs[tid]:
+                if s not in came_from and self.rank[s] <= bound:
+                    came_from[s] = tid
+                    stack.append(s)
+        return None
+
+    def find_cycle(self, tid, parent_ids):
+        """Cycle that making `parent_ids` the parents of `tid` would close, as a list of ids."""
+        with self.lock:
+            for p in parent_ids:
+                if p == tid:
+                    return [tid, tid]
+                if tid not in self.durations or p not in self.durations:
+                    continue
+                if p in self.preds[tid] or self.rank[p] < self.rank[tid]:
+                    continue
+                path = self.find_path(tid, p, self.rank[p])
+                if path:
+                    return [p, *path]
+        return None
+
+    def reorder(self, parent, child):
+        """Restore the rank order before the edge parent -> child is added."""
+        upper = self.rank[parent]
+        lower = self.rank[child]
+        if upper < lower:
+            return
+        forward = self.collect(child, self.succs, lambda rank: rank <= upper)
+        if parent in forward:
+            raise CycleError([parent, *self.find_path(child, parent, upper)])
+        backward = self.collect(parent, self.preds, lambda rank: rank >= lower)
+        moved = sorted(backward, key=self.rank.get) + sorted(forward, key=self.rank.get)
+        ranks = sorted(self.rank[tid] for tid in moved)
+        for tid, rank in zip(moved, ranks):
+            self.rank[tid] = rank
+
+    def collect(self, start, edges, within):
+        seen = {start}
+        stack = [start]
+        while stack:
+            for other in edges[stack.pop()]:
+                if other not in seen and within(self.rank[other]):
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def remove_task(self, tid):
+        with self.lock:
+            if tid not in self.durations:
+                return
+            self.finishes.remove(-(self.early_start[tid] + self.durations[tid]))
+            self.start_days.remove(self.starts[tid])
+            preds = self.preds.pop(tid)
+            succs = self.succs.pop(tid)
+            self.removed.add(tid)
+            self.changed.discard(tid)
+            self.changed.update(preds)
+            self.changed.update(succs)
+            for p in preds:
+                self.succs[p].discard(tid)
+            for s in succs:
+                self.preds[s].discard(tid)
+                self.depends[s] = [d for d in self.depends[s] if d != tid]
+            for table in (self.titles, self.starts, self.durations, self.depends, self.rank, self.early_start, self.tail):
+                del table[tid]
+            self.propagate_forward(list(succs))
+            self.propagate_backward(list(preds))
+
+    def propagate_forward(self, seeds):
+        """Recompute early starts from `seeds` on, in rank order, stopping where nothing changes."""
+        heap = [(self.rank[tid], tid) for tid in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        forced = set(seeds)
+        while heap:
+            _, tid = heapq.heappop(heap)
+            queued.discard(tid)
+            value = max((self.early_start[p] + self.durations[p] for p in self.preds[tid]), default=0)
+            if value != self.early_start[tid]:
+                duration = self.durations[tid]
+                self.finishes.remove(-(self.early_start[tid] + duration))
+                self.finishes.add(-(value + duration))
+                self.early_start[tid] = value
+                self.changed.add(tid)
+                self.changed.update(self.preds[tid])
+            elif tid not in forced:
+                continue
+            for s in self.succs[tid]:
+                if s not in queued:
+                    queued.add(s)
+                    heapq.heappush(heap, (self.rank[s], s))
+
+    def propagate_backward(self, seeds):
+        heap = [(-self.rank[tid], tid) for tid in seeds]
+        heapq.heapify(heap)
+        queued = set(seeds)
+        while heap:
+            _, tid = heapq.heappop(heap)
+            queued.discard(tid)
+            value = self.durations[tid] + max((self.tail[s] for s in self.succs[tid]), default=0)
+            if value == self.tail[tid]:
+                continue
+            self.tail[tid] = value
+            self.changed.add(tid)
+            for p in self.preds[tid]:
+                if p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, (-self.rank[p], p))
+
+    @property
+    def project_duration(self):
+        return -self.finishes.min()
+
+    def take_changes(self):
+        """Tasks whose schedule changed since the last call, the removed ones, and
+        whether everything must be republished (first call, rebuild, or a new
+        project start or duration, which shifts every late date)."""
+        with self.lock:
+            key = (self.project_duration, self.start_days.min())
+            full = key != self.published
+            self.published = key
+            changed = set(self.durations) if full else self.changed & self.durations.keys()
+            removed = self.removed
+            self.changed = set()
+            self.removed = set()
+        return changed, removed, full
+
+    def entries(self, tids):
+        with self.lock:
+            duration = self.project_duration
+            project_start = self.start_days.min()
+            tasks = {}
+            for tid in tids:
+                early_start = self.early_start[tid]
+                early_finish = early_start + self.durations[tid]
+                successor_start = min((self.early_start[s] for s in self.succs[tid]), default=duration)
+                tasks[tid] = task_entry(
+                    tid, self.titles[tid], self.starts[tid], self.durations[tid], self.depends[tid],
+                    early_start, duration - self.tail[tid], successor_start - early_finish, project_start
+                )
+        return tasks
+
+    def critical_path(self):
+        """Same (tasks, graph, critical) result as scheduling.cpm.calculate_critical_path."""
+        with self.lock:
+            tasks = self.entries(self.titles)
+            graph = {tid: list(succs) for tid, succs in self.succs.items() if succs}
+
+        critical_tasks = {tid for tid, task in tasks.items() if task["total_float"] == 0}
+        return tasks, graph, critical_tasks
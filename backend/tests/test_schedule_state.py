@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+import tempfile
+
+os.environ["DB_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"username": "state", "password": "state"})
+        client.post("/auth/login", data={"username": "state", "password": "state"})
+        yield client
+
+
+def create_task(client, column_id, title, start_date, end_date, parent_ids):
+    response = client.post(f"/kanban/columns/{column_id}/tasks/", json={
+        "title": title,
+        "position": 0,
+        "column_id": column_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "parent_ids": parent_ids
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def exported_depends_on(client, board_id):
+    response = client.get(f"/kanban/schedule/{board_id}/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    return {row["id"]: row["depends_on"] for row in map(json.loads, response.text.splitlines())}
+
+
+def test_deleting_a_parent_updates_the_child_schedule(client):
+    board = client.post("/kanban/boards/", params={"title": "b", "description": "d"}).json()
+    column = client.post(f"/kanban/boards/{board['id']}/columns/", json={"title": "todo"}).json()
+    # b is off the critical path, so deleting it leaves the project start and
+    # duration alone and only the incremental changes get published.
+    a = create_task(client, column["id"], "a", "2024-01-01", "2024-01-10", [])
+    b = create_task(client, column["id"], "b", "2024-01-01", "2024-01-03", [])
+    d = create_task(client, column["id"], "d", "2024-01-10", "2024-01-12", [a, b])
+    assert exported_depends_on(client, board["id"])[d] == [a, b]
+
+    assert client.delete(f"/kanban/tasks/{b}").status_code == 200
+
+    assert exported_depends_on(client, board["id"]) == {a: [], d: [a]}
+    graph = client.get(f"/kanban/cpm_graph/{board['id']}").json()
+    assert [(link["source"], link["target"]) for link in graph["links"]] == [(a, d)]
@@ -0,0 +1,47 @@
+const DAY_MS = 86400000
+
+const toDate = (day) => new Date(day * DAY_MS).toISOString().split("T")[0]
+
+
+// Builds the Plotly figure for a columnar Gantt payload from the API
+export default function ganttPlot(payload) {
+    const today = new Date().toISOString().split("T")[0]
+    const critical = payload.critical || payload.ids.map(() => false)
+
+    const data = [{
+        type: "bar",
+        orientation: "h",
+        y: payload.titles,
+        base: payload.start.map(toDate),
+        x: payload.start.map((start, i) => (payload.end[i] - start) * DAY_MS),
+        customdata: payload.start.map((start, i) => [toDate(start), toDate(payload.end[i])]),
+        hovertemplate: "%{y}<br>%{customdata[0]} – %{customdata[1]}<extra></extra>",
+        marker: { color: critical.map((flag) => flag ? "#ef553b" : "#636efa") }
+    }]
+
+    const layout = {
+        barmode: "overlay",
+        xaxis: {
+            type: "date",
+            range: payload.range ? payload.range.map(toDate) : undefined
+        },
+        yaxis: { autorange: "reversed" },
+        shapes: [
+            {
+                type: "line",
+                x0: today,
+                x1: today,
+                y0: 0,
+                y1: 1,
+                yref: "paper",
+                line: {
+                    color: "red",
+                    width: 1,
+                    dash: "solid"
+                }
+            }
+        ]
+    }
+
+    return { data, layout }
+}
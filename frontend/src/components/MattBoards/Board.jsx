@@ -5,6 +5,7 @@ import mattermostApi from "../../apis/mattApi"
 import MattColumns from "./Columns"
 import GanttChartEarlyMatt from "./GanttChartEarly"
 import GanttChartLateMatt from "./GanttChartLate"
+import GanttChartLeveledMatt from "./GanttChartLeveled"
 import CpmGraphMatt from "./CpmGraph"
 import ConfirmExport from "./ConfirmExport"
 
@@ -19,6 +20,7 @@ export default function MattBoard({ boardID }) {
     const [teamID, setTeamID] = useState("")
     const [isOpenGanttEarly, setIsOpenGanttEarly] = useState(false)
     const [isOpenGanttLate, setIsOpenGanttLate] = useState(false)
+    const [isOpenGanttLeveled, setIsOpenGanttLeveled] = useState(false)
     const [isOpenCpmGpaph, setIsOpenCpmGraph] = useState(false)
     
     useEffect(() => {
@@ -114,6 +116,10 @@ export default function MattBoard({ boardID }) {
         setIsOpenGanttLate((prev) => !prev)
     }
 
+    const toggleDropdownGanttLeveled = () => {
+        setIsOpenGanttLeveled((prev) => !prev)
+    }
+
     const toggleDropdownCpmGraph = () => {
         setIsOpenCpmGraph((prev) => !prev)
     }
@@ -147,6 +153,11 @@ export default function MattBoard({ boardID }) {
                         onClick={toggleDropdownGanttLate}
                     >Gantt Chart LS/LF
                     </button>
+                    <button
+                        className="bg-gray-300 text-gray-900 text-sm px-3 py-2 rounded-lg cursor-pointer hover:bg-gray-400 transition duration-200"
+                        onClick={toggleDropdownGanttLeveled}
+                    >Gantt Chart Leveled
+                    </button>
                     <button
                         className="bg-gray-300 text-gray-900 text-sm px-3 py-2 rounded-lg cursor-pointer hover:bg-gray-400 transition duration-200"
                         onClick={toggleDropdownCpmGraph}
@@ -184,6 +195,20 @@ export default function MattBoard({ boardID }) {
                 )}
             </AnimatePresence>
 
+            <AnimatePresence>
+                {isOpenGanttLeveled && (
+                    <motion.div
+                        initial={{ opacity: 0, y: -10 }}
+                        animate={{ opacity: 1, y: 0 }}
+                        exit={{ opacity: 0, y: -10 }}
+                        transition={{ duration: 0.2 }}
+                        className="bg-gray-50 border border-gray-300 p-3 rounded-lg"
+                    >
+                        <GanttChartLeveledMatt boardID={boardID} teamID={teamID} />
+                    </motion.div>
+                )}
+            </AnimatePresence>
+
             <AnimatePresence>
                 {isOpenCpmGpaph && (
                     <motion.div
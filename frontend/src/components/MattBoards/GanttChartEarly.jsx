@@ -2,6 +2,7 @@ import { useEffect, useState } from "react"
 import mattermostApi from "../../apis/mattApi"
 import Plot from "react-plotly.js"
 import LoadingIndicator from "../General/LoadingIndicator"
+import ganttPlot from "../General/ganttPlot"
 
 
 export default function GanttChartEarlyMatt({ boardID, teamID }) {
@@ -25,30 +26,7 @@ export default function GanttChartEarlyMatt({ boardID, teamID }) {
             })
 
             if (response.status === 200) {
-                const updatedLayout = {
-                    ...response.data.layout,
-                    shapes: [
-                        ...(response.data.layout.shapes || []),
-                        {
-                            type: "line",
-                            x0: new Date().toISOString().split("T")[0],
-                            x1: new Date().toISOString().split("T")[0],
-                            y0: 0,
-                            y1: 1,
-                            yref: "paper",
-                            line: {
-                                color: "red",
-                                width: 1,
-                                dash: "solid"
-                            }
-                        }
-                    ]
-                }
-            
-                setPlotData({
-                    data: response.data.data,
-                    layout: updatedLayout
-                })
+                setPlotData(ganttPlot(response.data))
 
             } else {
                 console.log("Failed to get data")
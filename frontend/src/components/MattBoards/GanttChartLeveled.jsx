@@ -0,0 +1,67 @@
+import { useEffect, useState } from "react"
+import mattermostApi from "../../apis/mattApi"
+import Plot from "react-plotly.js"
+import LoadingIndicator from "../General/LoadingIndicator"
+import ganttPlot from "../General/ganttPlot"
+
+
+export default function GanttChartLeveledMatt({ boardID, teamID }) {
+    const [plotData, setPlotData] = useState()
+    const [errorMsg, setErrorMsg] = useState("")
+    const [loading, setLoading] = useState(false)
+
+    useEffect(() => {
+        getGanttData()
+    }, [])
+
+    const getGanttData = async () => {
+        setLoading(true)
+
+        try {
+            const response = await mattermostApi.post("/gantt/leveled/", null, {
+                params: {
+                    board_id: boardID,
+                    team_id: teamID
+                }
+            })
+
+            if (response.status === 200) {
+                setPlotData(ganttPlot(response.data))
+
+            } else {
+                console.log("Failed to get data")
+            }
+
+        } catch (error) {
+            setErrorMsg("Some error")
+            console.log(error)
+
+        } finally {
+            setLoading(false)
+        }
+    }
+
+    return <>
+        {loading ? (
+            <div className="py-20">
+                <LoadingIndicator />
+            </div>
+        ) : plotData ? (
+            <div className="flex flex-col mx-auto gap-3">
+                <h1 className="font-bold text-xl text-gray-900">Gantt Chart (Resource Leveled)</h1>
+                <div className="bg-white p-1 rounded-lg shadow-lg">
+                    <Plot
+                        data={plotData.data}
+                        layout={plotData.layout}
+                        style={{ width: "100%", height: "550px" }}
+                        useResizeHandler={true}
+                    />
+                </div>
+            </div>
+        ) : (
+            <div className="w-[50%] bg-gray-200 flex mx-auto my-40 py-20 justify-center rounded-lg">
+                {errorMsg}
+            </div>
+        )}
+    </>
+}
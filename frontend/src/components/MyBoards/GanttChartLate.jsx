@@ -2,6 +2,7 @@ import { useEffect, useState } from "react"
 import api from "../../apis/api"
 import Plot from "react-plotly.js"
 import LoadingIndicator from "../General/LoadingIndicator"
+import ganttPlot from "../General/ganttPlot"
 
 
 export default function GanttChartLate({ boardID }) {
@@ -20,30 +21,7 @@ export default function GanttChartLate({ boardID }) {
             const response = await api.get(`/kanban/gantt/late/${boardID}`)
 
             if (response.status === 200) {
-                const updatedLayout = {
-                    ...response.data.layout,
-                    shapes: [
-                        ...(response.data.layout.shapes || []),
-                        {
-                            type: "line",
-                            x0: new Date().toISOString().split("T")[0],
-                            x1: new Date().toISOString().split("T")[0],
-                            y0: 0,
-                            y1: 1,
-                            yref: "paper",
-                            line: {
-                                color: "red",
-                                width: 1,
-                                dash: "solid"
-                            }
-                        }
-                    ]
-                }
-            
-                setPlotData({
-                    data: response.data.data,
-                    layout: updatedLayout
-                })
+                setPlotData(ganttPlot(response.data))
 
             } else {
                 console.log("Failed to get data")